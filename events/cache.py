@@ -0,0 +1,89 @@
+import hashlib
+import uuid
+
+from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+
+from mtm.settings import TZ, EVENTS_CACHE_TIMEOUT
+
+# Every snapshot key carries a token for its month and a token shared by
+# all months. Writes replace the tokens of the months they touch, which
+# orphans the old snapshots instead of having to find and delete them.
+GENERATION_KEY = 'events:generation'
+
+# Replaced on every write so per-process live indexes know to reload
+LIVE_KEY = 'events:live'
+
+def month_key(year, month):
+    return 'events:month:%d:%d' % (year, month)
+
+def tokens(keys):
+    values = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in values}
+
+    # A token that was evicted must not come back with an old value
+    if missing:
+        cache.set_many(missing, None)
+        values.update(missing)
+
+    return values
+
+def snapshot(key, token_keys, build):
+    values = tokens(token_keys)
+
+    hasher = hashlib.md5()
+    hasher.update(':'.join(values[token_key] for token_key in token_keys).encode('utf8'))
+    key = '%s:%s' % (key, hasher.hexdigest())
+
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, EVENTS_CACHE_TIMEOUT)
+
+    return value
+
+def month_snapshot(view, year, month, cutoff, build):
+    # Snapshots only depend on the day they were built on while that day
+    # falls inside the window they show
+    return snapshot(
+        'events:snapshot:%s:%d:%d:%s' % (view, year, month, cutoff.strftime('%Y%m%d') if cutoff else 'all'),
+        [GENERATION_KEY, month_key(year, month)],
+        build,
+    )
+
+def year_snapshot(year, build):
+    return snapshot(
+        'events:snapshot:year:%d' % year,
+        [GENERATION_KEY] + [month_key(year, month) for month in range(1, 13)],
+        build,
+    )
+
+def invalidate_dates(*dates):
+    # Month grids spill into the months on either side of them
+    months = set()
+    for date in dates:
+        if date is None:
+            continue
+
+        date = date.astimezone(TZ)
+        for offset in [-1, 0, 1]:
+            month = date + relativedelta(months=offset)
+            months.add((month.year, month.month))
+
+    cache.set_many({month_key(*month): uuid.uuid4().hex for month in months}, None)
+    cache.set(LIVE_KEY, uuid.uuid4().hex, None)
+
+def invalidate_between(date_from, date_to):
+    dates = []
+    date = date_from
+    while date <= date_to:
+        dates.append(date)
+        date = date + relativedelta(months=+1)
+
+    invalidate_dates(*dates, date_to)
+
+def invalidate_all():
+    cache.set_many({
+        GENERATION_KEY: uuid.uuid4().hex,
+        LIVE_KEY: uuid.uuid4().hex,
+    }, None)
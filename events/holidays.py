@@ -0,0 +1,83 @@
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from dateutil.easter import easter
+from django.urls import reverse
+
+from mtm.settings import TZ
+
+# Holidays are computed from these rules rather than stored, so every year
+# has them without anyone creating rows
+def fixed(month, day):
+    return lambda year: date(year, month, day)
+
+def nth_weekday(month, weekday, n):
+    def rule(year):
+        if n > 0:
+            first = date(year, month, 1)
+            return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+        last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+        return last - timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-n - 1))
+
+    return rule
+
+def from_easter(days):
+    return lambda year: easter(year) + timedelta(days=days)
+
+MONDAY = 0
+THURSDAY = 3
+SUNDAY = 6
+
+RULES = [
+    ('New Year\'s Day', fixed(1, 1)),
+    ('Martin Luther King Jr. Day', nth_weekday(1, MONDAY, 3)),
+    ('Valentine\'s Day', fixed(2, 14)),
+    ('Presidents\' Day', nth_weekday(2, MONDAY, 3)),
+    ('Casimir Pulaski Day', nth_weekday(3, MONDAY, 1)),
+    ('St. Patrick\'s Day', fixed(3, 17)),
+    ('Easter', from_easter(0)),
+    ('Mother\'s Day', nth_weekday(5, SUNDAY, 2)),
+    ('Memorial Day', nth_weekday(5, MONDAY, -1)),
+    ('Father\'s Day', nth_weekday(6, SUNDAY, 3)),
+    ('Juneteenth', fixed(6, 19)),
+    ('Independence Day', fixed(7, 4)),
+    ('Labor Day', nth_weekday(9, MONDAY, 1)),
+    ('Indigenous Peoples\' Day', nth_weekday(10, MONDAY, 2)),
+    ('Halloween', fixed(10, 31)),
+    ('Veterans Day', fixed(11, 11)),
+    ('Thanksgiving', nth_weekday(11, THURSDAY, 4)),
+    ('Christmas Eve', fixed(12, 24)),
+    ('Christmas Day', fixed(12, 25)),
+    ('New Year\'s Eve', fixed(12, 31)),
+]
+
+class Holiday:
+    holiday = True
+    all_day = True
+    id = None
+    date_end = None
+    location = None
+    location_id = None
+
+    def __init__(self, name, day):
+        self.name = name
+        self.date_start = TZ.localize(datetime(day.year, day.month, day.day))
+
+    def get_absolute_url(self):
+        return reverse('events:year', args=[self.date_start.year])
+
+@lru_cache(maxsize=None)
+def dates(year):
+    return tuple(sorted(((rule(year), name) for name, rule in RULES)))
+
+def between(date_from, date_to):
+    date_from = date_from.astimezone(TZ)
+    date_to = date_to.astimezone(TZ)
+
+    return [
+        Holiday(name, day)
+        for year in range(date_from.year, date_to.year + 1)
+        for day, name in dates(year)
+        if date_from.date() <= day and TZ.localize(datetime(day.year, day.month, day.day)) < date_to
+    ]
@@ -0,0 +1,659 @@
+import hashlib
+import re
+
+from datetime import datetime, timedelta
+from itertools import chain, groupby
+from urllib.parse import urlparse
+
+import pytz
+
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.html import strip_tags
+from django.utils.http import http_date, quote_etag
+
+from slugify import slugify
+
+from mtm.settings import TZ, NAME, DOMAIN
+from .managers import WEEKDAYS, series_rule
+
+FREQUENCIES = {
+    1: 'DAILY',
+    2: 'WEEKLY',
+    3: 'MONTHLY',
+    4: 'YEARLY',
+}
+
+BYDAY = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+# Matches the TIME_ZONE setting; US daylight saving rules since 2007
+VTIMEZONE = [
+    'BEGIN:VTIMEZONE',
+    'TZID:America/Chicago',
+    'BEGIN:DAYLIGHT',
+    'TZOFFSETFROM:-0600',
+    'TZOFFSETTO:-0500',
+    'TZNAME:CDT',
+    'DTSTART:19700308T020000',
+    'RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=2SU',
+    'END:DAYLIGHT',
+    'BEGIN:STANDARD',
+    'TZOFFSETFROM:-0500',
+    'TZOFFSETTO:-0600',
+    'TZNAME:CST',
+    'DTSTART:19701101T020000',
+    'RRULE:FREQ=YEARLY;BYMONTH=11;BYDAY=1SU',
+    'END:STANDARD',
+    'END:VTIMEZONE',
+]
+
+HOST = urlparse(DOMAIN).hostname
+
+# Imports are inserted and updated this many events at a time
+BATCH_SIZE = 500
+
+PARAMETER_REGEX = re.compile(r'(?:[^;"]|"[^"]*")+')
+UNESCAPE_REGEX = re.compile(r'\\([\\;,nN])')
+DURATION_REGEX = re.compile(r'^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+def escape(text):
+    return (
+        text.replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+def fold(line):
+    # Content lines are limited to 75 octets, continued on lines that
+    # start with a space
+    encoded = line.encode('utf8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+
+    lines = []
+    current = ''
+    limit = 75
+    for char in line:
+        if len((current + char).encode('utf8')) > limit:
+            lines.append(current)
+            current = ''
+            limit = 74
+        current += char
+    lines.append(current)
+
+    return '\r\n '.join(lines) + '\r\n'
+
+def utc(date):
+    return date.astimezone(pytz.utc).strftime('%Y%m%dT%H%M%SZ')
+
+def date_property(name, date, all_day):
+    if all_day:
+        return '%s;VALUE=DATE:%s' % (name, date.strftime('%Y%m%d'))
+
+    return '%s;TZID=%s:%s' % (name, TZ.zone, date.strftime('%Y%m%dT%H%M%S'))
+
+def rrule_property(info, all_day, until=None):
+    value = 'FREQ=%s;INTERVAL=%d' % (FREQUENCIES[info.frequency_units], info.frequency)
+
+    weekdays = [weekday.weekday for weekday in info.weekday_set.all()]
+    if weekdays:
+        value += ';BYDAY=' + ','.join(BYDAY[weekday] for weekday in sorted(weekdays))
+
+    if until is None and info.ends == 1:
+        until = info.ends_on.astimezone(TZ).replace(tzinfo=None)
+
+    if until:
+        value += ';UNTIL=' + (until.strftime('%Y%m%d') if all_day else utc(TZ.localize(until)))
+    elif info.ends == 2:
+        value += ';COUNT=%d' % info.ends_after
+
+    return 'RRULE:' + value
+
+def vevent(event, uid, rrule=None, exdates=()):
+    date_start = event.date_start.astimezone(TZ)
+
+    yield 'BEGIN:VEVENT'
+    yield 'UID:%s@%s' % (uid, HOST)
+    yield 'DTSTAMP:' + utc(event.date_updated)
+    yield date_property('DTSTART', date_start, event.all_day)
+
+    if event.all_day:
+        date_end = event.date_end.astimezone(TZ) if event.date_end else date_start
+        yield date_property('DTEND', date_end + timedelta(days=1), True)
+    elif event.date_end:
+        yield date_property('DTEND', event.date_end.astimezone(TZ), False)
+
+    if rrule:
+        yield rrule
+
+    for exdate in exdates:
+        yield date_property('EXDATE', exdate, event.all_day)
+
+    yield 'SUMMARY:' + escape(event.name)
+
+    if event.description:
+        yield 'DESCRIPTION:' + escape(strip_tags(event.description))
+
+    if event.location:
+        yield 'LOCATION:' + escape(', '.join(part for part in [
+            event.location.name,
+            event.location.address1,
+            event.location.address2,
+            '%s, %s %s' % (event.location.city, event.location.state, event.location.zip_code or ''),
+        ] if part).strip())
+
+    yield 'URL:' + DOMAIN + event.get_absolute_url()
+    yield 'END:VEVENT'
+
+def signature(event):
+    return (
+        event.name,
+        event.description,
+        event.all_day,
+        event.location_id,
+        event.album_id,
+        event.date_end.astimezone(TZ).replace(tzinfo=None) - event.date_start.astimezone(TZ).replace(tzinfo=None) if event.date_end else None,
+    )
+
+def series(info, events):
+    # The first upcoming occurrence becomes the master; every other one the
+    # rule reproduces unchanged is folded into it, while moved or edited
+    # occurrences are excluded from the rule and sent on their own
+    master = events[0]
+    dtstart = master.date_start.astimezone(TZ).replace(tzinfo=None)
+    until = events[-1].date_start.astimezone(TZ).replace(tzinfo=None)
+
+    expected = set(info.rrule(dtstart=dtstart, until=until))
+    expected.add(dtstart)
+
+    covered = set()
+    others = []
+    for event in events:
+        date_start = event.date_start.astimezone(TZ).replace(tzinfo=None)
+
+        if date_start in expected and date_start not in covered and signature(event) == signature(master):
+            covered.add(date_start)
+        else:
+            others.append(event)
+
+    yield from vevent(
+        master,
+        'series-%d' % info.id,
+        rrule_property(info, master.all_day, until),
+        sorted(expected - covered),
+    )
+
+    for event in others:
+        yield from vevent(event, 'event-%d' % event.id)
+
+def calendar(name, date_from, **filters):
+    from .models import Event, RecurringEvent, RepeatInfo, RecurrenceException
+
+    yield 'BEGIN:VCALENDAR'
+    yield 'VERSION:2.0'
+    yield 'PRODID:-//%s//Events//EN' % NAME
+    yield 'CALSCALE:GREGORIAN'
+    yield 'X-WR-CALNAME:' + escape(name)
+    yield 'X-WR-TIMEZONE:' + TZ.zone
+    yield from VTIMEZONE
+
+    # Standalone events, including occurrences materialized out of
+    # virtual series
+    for event in Event.objects.window(date_from, **filters).exclude(
+        info__virtual=False,
+    ).iterator():
+        yield from vevent(event, 'event-%d' % event.id)
+
+    # Stored series, one group of rows at a time
+    events = RecurringEvent.objects.select_related('location').filter(
+        date_start__gte=date_from,
+        info__virtual=False,
+        **filters
+    ).order_by('info_id', 'date_start')
+
+    infos = {
+        info.id: info for info in RepeatInfo.objects.filter(
+            id__in=events.values('info_id'),
+        ).prefetch_related('weekday_set')
+    }
+
+    for info_id, group in groupby(events.iterator(), key=lambda event: event.info_id):
+        yield from series(infos[info_id], list(group))
+
+    # Virtual series are their rule already
+    infos = list(RecurringEvent.objects.virtual_series(date_from, **filters).prefetch_related('weekday_set'))
+
+    exceptions = {}
+    for info_id, date_start in RecurrenceException.objects.filter(info__in=infos).values_list('info_id', 'date_start'):
+        exceptions.setdefault(info_id, []).append(date_start.astimezone(TZ))
+
+    for info in infos:
+        yield from vevent(
+            info.occurrence(info.date_start),
+            'series-%d' % info.id,
+            rrule_property(info, info.all_day),
+            sorted(exceptions.get(info.id, [])),
+        )
+
+    yield 'END:VCALENDAR'
+
+def feed(request, name, filename, **filters):
+    from .models import Event
+
+    date_from = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    etag, last_modified = Event.objects.state(date_from, None, ('ics', date_from.date()), **filters)
+    etag = quote_etag(etag)
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    if response is None:
+        response = StreamingHttpResponse(
+            (fold(line) for line in calendar(name, date_from, **filters)),
+            content_type='text/calendar; charset=utf-8',
+        )
+        response['Content-Disposition'] = 'inline; filename="%s.ics"' % filename
+
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+
+    return response
+
+def unfold(lines):
+    current = None
+
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf8')
+
+        line = line.rstrip('\r\n')
+
+        if line[:1] in (' ', '\t'):
+            if current is not None:
+                current += line[1:]
+            continue
+
+        if current:
+            yield current
+
+        current = line
+
+    if current:
+        yield current
+
+def parse_line(line):
+    # Quoted parameter values may contain colons and semicolons
+    quoted = False
+    for i, char in enumerate(line):
+        if char == '"':
+            quoted = not quoted
+        elif char == ':' and not quoted:
+            break
+    else:
+        return (line.upper(), {}, '')
+
+    name, *params = PARAMETER_REGEX.findall(line[:i])
+    params = dict(param.split('=', 1) for param in params if '=' in param)
+
+    return (
+        name.upper(),
+        {key.upper(): value.strip('"') for key, value in params.items()},
+        line[i + 1:],
+    )
+
+def components(lines):
+    properties = None
+    hasher = None
+    depth = 0
+
+    for line in unfold(lines):
+        name, params, value = parse_line(line)
+
+        if name == 'BEGIN':
+            if properties is not None:
+                depth += 1
+            elif value.upper() == 'VEVENT':
+                properties = {}
+                hasher = hashlib.md5()
+            continue
+
+        if name == 'END':
+            if depth:
+                depth -= 1
+            elif properties is not None and value.upper() == 'VEVENT':
+                yield (properties, hasher.hexdigest())
+                properties = None
+            continue
+
+        # Alarms and other nested components are not imported
+        if properties is None or depth:
+            continue
+
+        # DTSTAMP changes on every export without the event changing
+        if name != 'DTSTAMP':
+            hasher.update(line.encode('utf8'))
+
+        properties.setdefault(name, []).append((params, value))
+
+def unescape(text):
+    return UNESCAPE_REGEX.sub(lambda match: '\n' if match.group(1) in 'nN' else match.group(1), text)
+
+def parse_date(params, value):
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return (TZ.localize(datetime.strptime(value[:8], '%Y%m%d')), True)
+
+    date = datetime.strptime(value[:15], '%Y%m%dT%H%M%S')
+
+    if value.endswith('Z'):
+        return (pytz.utc.localize(date), False)
+
+    # Floating times are read as local to the site
+    try:
+        tz = pytz.timezone(params['TZID']) if 'TZID' in params else TZ
+    except pytz.UnknownTimeZoneError:
+        tz = TZ
+
+    return (tz.localize(date), False)
+
+def parse_duration(value):
+    match = DURATION_REGEX.match(value)
+    if not match:
+        return None
+
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(
+        weeks=int(weeks or 0),
+        days=int(days or 0),
+        hours=int(hours or 0),
+        minutes=int(minutes or 0),
+        seconds=int(seconds or 0),
+    )
+
+    return -duration if sign == '-' else duration
+
+def first(properties, name):
+    return properties[name][0] if name in properties else (None, None)
+
+def fields(properties, checksum):
+    name = unescape(first(properties, 'SUMMARY')[1] or '').strip()
+    params, value = first(properties, 'DTSTART')
+
+    if not name or not value:
+        return None
+
+    try:
+        date_start, all_day = parse_date(params, value)
+
+        date_end = None
+        if 'DTEND' in properties:
+            date_end = parse_date(*first(properties, 'DTEND'))[0]
+        elif 'DURATION' in properties:
+            duration = parse_duration(first(properties, 'DURATION')[1])
+            date_end = date_start + duration if duration else None
+    except ValueError:
+        return None
+
+    # All-day events run to the end of their day on this site
+    if all_day or (date_end and date_end <= date_start):
+        date_end = None
+
+    description = unescape(first(properties, 'DESCRIPTION')[1] or '').strip()
+
+    return {
+        'ical_uid': (first(properties, 'UID')[1] or checksum)[:255],
+        'ical_checksum': checksum,
+        'name': name[:255],
+        'description': description or None,
+        'all_day': all_day,
+        'date_start': date_start.astimezone(pytz.utc),
+        'date_end': date_end.astimezone(pytz.utc) if date_end else None,
+        'location': unescape(first(properties, 'LOCATION')[1] or '').strip(),
+    }
+
+def rrule_kwargs(value):
+    parts = dict(part.split('=', 1) for part in value.upper().split(';') if '=' in part)
+    units = {name: units for units, name in FREQUENCIES.items()}
+
+    # Only rules the create form can express are imported
+    if parts.get('FREQ') not in units or set(parts) - {'FREQ', 'INTERVAL', 'BYDAY', 'UNTIL', 'COUNT', 'WKST'}:
+        return None
+
+    try:
+        kwargs = {
+            'frequency': int(parts.get('INTERVAL', 1)),
+            'frequency_units': units[parts['FREQ']],
+            'ends': 0,
+        }
+
+        if 'BYDAY' in parts:
+            weekdays = parts['BYDAY'].split(',')
+            if parts['FREQ'] not in ('DAILY', 'WEEKLY') or set(weekdays) - set(BYDAY):
+                return None
+
+            kwargs['weekday_list'] = [WEEKDAYS[BYDAY.index(weekday)] for weekday in weekdays]
+
+        if 'UNTIL' in parts:
+            ends_on, date_only = parse_date({}, parts['UNTIL'])
+            kwargs['ends'] = 1
+            kwargs['ends_on'] = ends_on + timedelta(days=1) - timedelta(microseconds=1) if date_only else ends_on
+        elif 'COUNT' in parts:
+            kwargs['ends'] = 2
+            kwargs['ends_after'] = int(parts['COUNT'])
+    except (ValueError, KeyError):
+        return None
+
+    if kwargs['frequency'] < 1 or kwargs.get('ends_after', 1) < 1:
+        return None
+
+    return kwargs
+
+def upcoming(kwargs, date_start, date_end, date_from):
+    # Series that began before date_from are stored from their first
+    # occurrence since, so the rule keeps its phase and the one-year window
+    # covers dates still to come; maintain_events extends them from there
+    start = date_start.astimezone(TZ).replace(tzinfo=None)
+
+    rule = series_rule(
+        start,
+        kwargs['frequency'],
+        kwargs['frequency_units'],
+        weekdays=[WEEKDAYS.index(weekday) for weekday in kwargs.get('weekday_list', [])],
+        until=kwargs['ends_on'].astimezone(TZ).replace(tzinfo=None) if kwargs['ends'] == 1 else None,
+        count=kwargs.get('ends_after') if kwargs['ends'] == 2 else None,
+    )
+
+    date = rule.after(date_from.astimezone(TZ).replace(tzinfo=None), inc=True)
+    if date is None:
+        return None
+
+    if kwargs['ends'] == 2:
+        kwargs['ends_after'] -= len(rule.between(start, date, inc=True)) - 1
+
+    date_end = TZ.localize(date + (date_end.astimezone(TZ).replace(tzinfo=None) - start)) if date_end else None
+
+    return (TZ.localize(date), date_end)
+
+def import_calendar(lines, category=0):
+    from locations.models import Location
+    from .cache import invalidate_all
+    from .models import Event, RecurringEvent, RepeatInfo
+
+    counts = {
+        'created': 0,
+        'updated': 0,
+        'skipped': 0,
+    }
+    locations = {}
+    batch = []
+    overrides = []
+    date_from = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def location(text):
+        parts = [part.strip() for part in text.split(',')]
+        name = parts[0][:100]
+        if not name:
+            return None
+
+        if name.lower() not in locations:
+            locations[name.lower()] = Location.objects.filter(name__iexact=name).first() or Location.objects.create(
+                name=name,
+                category=category,
+                address1=parts[1][:200] if len(parts) > 1 else '',
+                address2='',
+            )
+
+        return locations[name.lower()]
+
+    def flush():
+        with transaction.atomic():
+            existing = {event.ical_uid: event for event in Event.objects.filter(
+                ical_uid__in=[event['ical_uid'] for event in batch],
+                info__isnull=True,
+            )}
+
+            created = []
+            updated = []
+            for event in batch:
+                event['location'] = location(event['location'])
+                event['slug'] = slugify(event['name'])
+
+                current = existing.get(event['ical_uid'])
+
+                if current is None:
+                    existing[event['ical_uid']] = Event(**event)
+                    created.append(existing[event['ical_uid']])
+                elif current.ical_checksum == event['ical_checksum']:
+                    counts['skipped'] += 1
+                else:
+                    for field, value in event.items():
+                        setattr(current, field, value)
+
+                    # A UID repeated within the file only keeps its last copy
+                    if current.pk is None:
+                        counts['skipped'] += 1
+                    elif current not in updated:
+                        updated.append(current)
+
+            for event in chain(created, updated):
+                event.set_local_dates()
+
+            # bulk_update() leaves auto_now fields alone
+            now = datetime.now(pytz.utc)
+            for event in updated:
+                event.date_updated = now
+
+            Event.objects.bulk_create(created, batch_size=BATCH_SIZE)
+            Event.objects.bulk_update(updated, list(batch[0].keys()) + ['local_date', 'local_end_date', 'date_updated'], batch_size=BATCH_SIZE)
+
+        counts['created'] += len(created)
+        counts['updated'] += len(updated)
+        batch.clear()
+
+    def series(event, properties):
+        kwargs = rrule_kwargs(first(properties, 'RRULE')[1])
+        if kwargs is None:
+            counts['skipped'] += 1
+            return
+
+        info = RepeatInfo.objects.filter(ical_uid=event['ical_uid']).first()
+        if info and info.ical_checksum == event['ical_checksum']:
+            counts['skipped'] += 1
+            return
+
+        try:
+            exdates = [
+                parse_date(params, value)[0].astimezone(pytz.utc)
+                for params, values in properties.get('EXDATE', [])
+                for value in values.split(',')
+            ]
+        except ValueError:
+            counts['skipped'] += 1
+            return
+
+        dates = upcoming(kwargs, event['date_start'], event['date_end'], date_from)
+        if dates is None:
+            counts['skipped'] += 1
+            return
+
+        date_start, date_end = dates
+
+        with transaction.atomic():
+            # Changed series are rebuilt from their new rule
+            if info:
+                info.delete()
+
+            RecurringEvent.objects.create_recurring_event(
+                event['name'],
+                date_start,
+                kwargs.pop('frequency'),
+                kwargs.pop('frequency_units'),
+                kwargs.pop('ends'),
+                description=event['description'],
+                all_day=event['all_day'],
+                location=location(event['location']),
+                ical_uid=event['ical_uid'],
+                ical_checksum=event['ical_checksum'],
+                **({'date_end': date_end} if date_end else {}),
+                **kwargs
+            )
+
+            if exdates:
+                RecurringEvent.objects.filter(info__ical_uid=event['ical_uid'], date_start__in=exdates).delete()
+
+        counts['updated' if info else 'created'] += 1
+
+    # A file is imported whole or not at all
+    with transaction.atomic():
+        for properties, checksum in components(lines):
+            event = fields(properties, checksum)
+
+            if event is None:
+                counts['skipped'] += 1
+            elif 'RECURRENCE-ID' in properties:
+                overrides.append((event, properties))
+            elif 'RRULE' in properties:
+                series(event, properties)
+            else:
+                batch.append(event)
+                if len(batch) >= BATCH_SIZE:
+                    flush()
+
+        if batch:
+            flush()
+
+        # Moved or edited instances of a series, applied once every series
+        # they could belong to exists
+        for event, properties in overrides:
+            try:
+                recurrence_id = parse_date(*first(properties, 'RECURRENCE-ID'))[0]
+            except ValueError:
+                counts['skipped'] += 1
+                continue
+
+            occurrence = RecurringEvent.objects.filter(
+                info__ical_uid=event['ical_uid'],
+                date_start=recurrence_id.astimezone(pytz.utc),
+            ).first()
+
+            event['location'] = location(event['location'])
+            event.pop('ical_uid')
+            event.pop('ical_checksum')
+
+            if occurrence is None or all(getattr(occurrence, field) == value for field, value in event.items()):
+                counts['skipped'] += 1
+                continue
+
+            for field, value in event.items():
+                setattr(occurrence, field, value)
+            occurrence.save()
+            counts['updated'] += 1
+
+    # Bulk inserts and updates send no signals
+    invalidate_all()
+
+    return counts
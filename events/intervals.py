@@ -0,0 +1,56 @@
+from operator import itemgetter
+
+# A static interval tree over half-open (start, end, item) intervals. The
+# intervals are sorted by start and laid out as an implicit balanced binary
+# tree in which every node keeps the latest end in its subtree, so branches
+# that end before a query starts are never visited.
+class IntervalTree:
+    def __init__(self, intervals):
+        self.intervals = sorted(intervals, key=itemgetter(0))
+        self.max_ends = [None] * len(self.intervals)
+
+        if self.intervals:
+            self.build(0, len(self.intervals) - 1)
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def build(self, low, high):
+        middle = (low + high) // 2
+        max_end = self.intervals[middle][1]
+
+        if low < middle:
+            max_end = max(max_end, self.build(low, middle - 1))
+
+        if middle < high:
+            max_end = max(max_end, self.build(middle + 1, high))
+
+        self.max_ends[middle] = max_end
+
+        return max_end
+
+    def overlapping(self, start, end):
+        found = []
+        self.search(0, len(self.intervals) - 1, start, end, found)
+
+        return found
+
+    def search(self, low, high, start, end, found):
+        if low > high:
+            return
+
+        middle = (low + high) // 2
+        if self.max_ends[middle] <= start:
+            return
+
+        self.search(low, middle - 1, start, end, found)
+
+        # Everything to the right starts at or after this node
+        interval = self.intervals[middle]
+        if interval[0] >= end:
+            return
+
+        if interval[1] > start:
+            found.append(interval)
+
+        self.search(middle + 1, high, start, end, found)
@@ -0,0 +1,88 @@
+import threading
+import time
+
+from datetime import datetime, timedelta
+from django.core.cache import cache
+from django.db.models import Q
+
+from mtm.settings import TZ, EVENTS_LIVE_REFRESH
+from .cache import LIVE_KEY
+from .intervals import IntervalTree
+
+# Each process keeps the events of the next two days in an interval tree
+# and answers "what is on between these times" from memory. The tree is
+# rebuilt when an event write replaces the live token, when the refresh
+# interval runs out, or when a query reaches past the hours it covers.
+WINDOW = timedelta(hours=48)
+
+index = None
+lock = threading.Lock()
+
+class LiveIndex:
+    def __init__(self, token, date_from):
+        from .models import Event, RecurringEvent
+
+        self.token = token
+        self.built = time.monotonic()
+        self.date_from = date_from
+        self.date_to = date_from + WINDOW
+
+        # Untimed events are treated as running to the end of their day
+        events = Event.objects.select_related('location').filter(
+            Q(date_end__gt=self.date_from) | Q(date_start__gte=self.date_from - timedelta(days=1)),
+            date_start__lt=self.date_to,
+        )
+
+        virtual_events = RecurringEvent.objects.expand(
+            self.date_from - timedelta(days=1),
+            self.date_to,
+        )
+
+        intervals = []
+        for event in list(events) + virtual_events:
+            date_start = event.date_start.astimezone(TZ)
+            date_end = event.date_end.astimezone(TZ) if event.date_end else None
+            if not date_end or event.all_day:
+                date_end = TZ.localize(date_start.replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1))
+
+            intervals.append((date_start, date_end, {
+                'id': event.id,
+                'name': event.name,
+                'url': event.get_absolute_url(),
+                'all_day': event.all_day,
+                'date_start': date_start.isoformat(),
+                'date_end': event.date_end.astimezone(TZ).isoformat() if event.date_end else None,
+                'location_id': event.location.id if event.location else None,
+                'location': event.location.name if event.location else None,
+                'neighborhood_id': event.location.neighborhood_id if event.location else None,
+            }))
+
+        self.tree = IntervalTree(intervals)
+
+    def stale(self, token, date_from, date_to):
+        return (
+            token != self.token or
+            time.monotonic() - self.built > EVENTS_LIVE_REFRESH or
+            date_from < self.date_from or
+            date_to > self.date_to
+        )
+
+def between(date_from, date_to, **filters):
+    global index
+
+    # Polling clients only read the token from the cache
+    token = cache.get(LIVE_KEY)
+    current = index
+
+    if current is None or current.stale(token, date_from, date_to):
+        with lock:
+            current = index
+            if current is None or current.stale(token, date_from, date_to):
+                current = index = LiveIndex(token, min(date_from, datetime.now(TZ)))
+
+    events = [
+        item for _, _, item in current.tree.overlapping(date_from, date_to)
+        if all(item[key] == value for key, value in filters.items())
+    ]
+
+    return sorted(events, key=lambda item: (item['date_start'], item['name']))
@@ -0,0 +1,287 @@
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.template.defaultfilters import slugify
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from events.models import Event, RecurringEvent
+from locations.models import CATEGORIES, Location, Neighborhood
+from mtm.settings import TZ
+
+# The dataset lives in a test database and the listings in a private
+# in-process cache, so a run never touches real events or warm pages
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-events',
+    },
+}
+
+DATE_FORMAT = '%m/%d/%Y %I:%M %p'
+
+class Command(BaseCommand):
+    help = 'Seeds a synthetic dataset into a test database and times the event managers against it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locations', type=int, default=2000, help='Locations to create')
+        parser.add_argument('--neighborhoods', type=int, default=100, help='Neighborhoods to spread the locations over')
+        parser.add_argument('--series', type=int, default=300, help='Weekly series to create')
+        parser.add_argument('--weeks', type=int, default=52, help='Occurrences in each weekly series')
+        parser.add_argument('--occurrences', type=int, default=200000, help='Event rows in total, series occurrences included')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs of each operation; the report keeps the median')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the dataset')
+        parser.add_argument('--output', default='benchmark_events.json', help='Where to write the JSON report')
+        parser.add_argument('--compare', help='An earlier report to print changes against')
+
+    def handle(self, *args, **kwargs):
+        baseline = None
+        if kwargs['compare']:
+            try:
+                with open(kwargs['compare']) as f:
+                    baseline = json.load(f)['operations']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError('Could not read {}: {}'.format(kwargs['compare'], e))
+
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES):
+                started = time.perf_counter()
+                dataset = self.seed(kwargs)
+                self.stdout.write('Seeded {} events in {:.1f} seconds.'.format(dataset['events'], time.perf_counter() - started))
+
+                operations = self.run(kwargs['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'date': datetime.now(TZ).isoformat(),
+            'database': connection.vendor,
+            'repeat': kwargs['repeat'],
+            'dataset': dataset,
+            'operations': operations,
+        }
+
+        with open(kwargs['output'], 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+        self.table(operations, baseline)
+
+        # success message
+        self.stdout.write(self.style.SUCCESS('Report written to {}.'.format(kwargs['output'])))
+
+    def seed(self, kwargs):
+        rng = random.Random(kwargs['seed'])
+        today = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        neighborhoods = Neighborhood.objects.bulk_create([
+            Neighborhood(name='Neighborhood {}'.format(i), slug='neighborhood-{}'.format(i))
+            for i in range(max(kwargs['neighborhoods'], 1))
+        ])
+
+        locations = Location.objects.bulk_create([
+            Location(
+                name='Location {}'.format(i),
+                slug='location-{}'.format(i),
+                category=rng.randrange(len(CATEGORIES)),
+                neighborhood=rng.choice(neighborhoods),
+                address1='{} N State St'.format(i + 1),
+                address2='',
+            )
+            for i in range(max(kwargs['locations'], 1))
+        ])
+
+        # Locations on SQLite come back without ids
+        locations = list(Location.objects.order_by('id'))
+
+        # Series start within the coming month at an evening hour
+        for i in range(kwargs['series']):
+            date_start = today + timedelta(days=rng.randrange(30), hours=rng.randrange(17, 22))
+
+            RecurringEvent.objects.create_recurring_event(
+                'Series {}'.format(i),
+                date_start,
+                1,
+                1,
+                2,
+                ends_after=kwargs['weeks'],
+                date_end=date_start + timedelta(hours=2),
+                location=rng.choice(locations),
+            )
+
+        # One-off events spread over the past month and the coming year
+        remaining = kwargs['occurrences'] - RecurringEvent.objects.count()
+        while remaining > 0:
+            events = []
+            for i in range(min(remaining, 5000)):
+                date_start = today + timedelta(days=rng.randrange(-30, 365), hours=rng.randrange(8, 24))
+                all_day = rng.random() < 0.05
+
+                event = Event(
+                    name='Event {}'.format(remaining - i),
+                    slug='event-{}'.format(remaining - i),
+                    all_day=all_day,
+                    date_start=date_start.replace(hour=0) if all_day else date_start,
+                    date_end=None if all_day else date_start + timedelta(hours=rng.randrange(1, 4)),
+                    location=rng.choice(locations) if rng.random() < 0.9 else None,
+                )
+                event.set_local_dates()
+                events.append(event)
+
+            Event.objects.bulk_create(events)
+            remaining -= len(events)
+
+        # The write benchmarks get a venue of their own so their conflict
+        # checks never fail
+        Location.objects.create(name='Benchmark Hall', category=3, address1='1 E Benchmark St', address2='')
+
+        return {
+            'neighborhoods': Neighborhood.objects.count(),
+            'locations': Location.objects.count(),
+            'series': kwargs['series'],
+            'events': Event.objects.count(),
+            'seed': kwargs['seed'],
+        }
+
+    def measure(self, function, before=None):
+        if before:
+            before()
+
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            result = function()
+            seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return result, (seconds, len(queries), peak)
+
+    def run(self, repeat):
+        rf = RequestFactory()
+        request = rf.get('/events/')
+        venue = Location.objects.get(name='Benchmark Hall')
+
+        single = Event.objects.filter(info__isnull=True, location__isnull=False).order_by('date_start').first()
+        occurrence = RecurringEvent.objects.order_by('date_start').first()
+
+        samples = {}
+        def sample(name, function, before=None):
+            result, measurement = self.measure(function, before)
+            samples.setdefault(name, []).append(measurement)
+
+            return result
+
+        def event(event):
+            return lambda: Event.objects.event(
+                CATEGORIES[event.location.category] if event.location else 'events',
+                event.location.slug if event.location else 'undefined',
+                event.slug,
+                event.id,
+            )
+
+        for i in range(max(repeat, 1)):
+            for name in ['calendar', 'by_date', 'by_location']:
+                listing = getattr(Event.objects, name)
+                sample(name + ' (cold)', lambda: listing(request), cache.clear)
+                sample(name + ' (warm)', lambda: listing(request))
+
+            sample('event (single)', event(single))
+            sample('event (recurring)', event(occurrence))
+
+            # Each run creates, edits and deletes a series of its own, which
+            # leaves the dataset as it found it
+            date_start = datetime.now(TZ).replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+            series = sample('create_recurring_event', lambda: list(RecurringEvent.objects.create_recurring_event(
+                'Benchmark Series {}'.format(i),
+                date_start,
+                1,
+                1,
+                2,
+                ends_after=52,
+                date_end=date_start + timedelta(hours=1),
+                location=venue,
+            )))
+            first = series[0]
+
+            valid, response = sample('update_recurring_event', lambda: RecurringEvent.objects.update_recurring_event(rf.post('/events/update/', {
+                'id': first.id,
+                'name': 'Benchmark Series {} Moved'.format(i),
+                'date-start': (date_start + timedelta(hours=1)).strftime(DATE_FORMAT),
+                'date-end': (date_start + timedelta(hours=2)).strftime(DATE_FORMAT),
+                'location-id': venue.id,
+                'location-name': venue.name,
+                'album-id': '0',
+                'album-name': '',
+            }), first.info))
+            if not valid:
+                raise CommandError('update_recurring_event failed: {}'.format(response))
+
+            valid, response = sample('delete_event', lambda: Event.objects.delete_event(rf.post('/events/delete/', {
+                'id': first.id,
+                'delete': 'multiple-events',
+            })))
+            if not valid:
+                raise CommandError('delete_event failed: {}'.format(response))
+
+        operations = {}
+        for name, runs in samples.items():
+            seconds = [run[0] for run in runs]
+            operations[name] = {
+                'seconds': statistics.median(seconds),
+                'min_seconds': min(seconds),
+                'max_seconds': max(seconds),
+                'queries': max(run[1] for run in runs),
+                'peak_kib': max(run[2] for run in runs) // 1024,
+            }
+
+        return operations
+
+    def table(self, operations, baseline=None):
+        def change(name, key):
+            if not baseline or name not in baseline or not baseline[name][key]:
+                return ''
+
+            return '{:+.0%}'.format(operations[name][key] / baseline[name][key] - 1)
+
+        header = ['Operation', 'ms', 'Queries', 'Peak KiB']
+        if baseline:
+            header += ['Δ ms', 'Δ KiB']
+
+        rows = []
+        for name, result in operations.items():
+            row = [name, '{:.1f}'.format(result['seconds'] * 1000), str(result['queries']), str(result['peak_kib'])]
+            if baseline:
+                row += [change(name, 'seconds'), change(name, 'peak_kib')]
+            rows.append(row)
+
+        # table member widths
+        widths = [max(len(row[i]) for row in [header] + rows) + 2 for i in range(len(header))]
+
+        # top line of table
+        self.stdout.write('┌{}┐'.format('┬'.join('─' * width for width in widths)))
+
+        # table header
+        self.stdout.write('│{}│'.format('│'.join('{:^{width}}'.format(cell, width=width) for cell, width in zip(header, widths))))
+
+        # header/body divider
+        self.stdout.write('╞{}╡'.format('╪'.join('═' * width for width in widths)))
+
+        # body
+        for row in rows:
+            self.stdout.write('│ {:<{width}}│{}│'.format(row[0], '│'.join(
+                '{:^{width}}'.format(cell, width=width) for cell, width in zip(row[1:], widths[1:])
+            ), width=widths[0] - 1))
+
+        # bottom line of table
+        self.stdout.write('└{}┘'.format('┴'.join('─' * width for width in widths)))
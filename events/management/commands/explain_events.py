@@ -0,0 +1,81 @@
+import re
+
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from events.managers import month_bounds
+from events.models import Event, RecurringEvent, RecurrenceException
+from locations.models import Location, Neighborhood
+from mtm.settings import TZ
+
+# Plan lines that mean a table (or all of one of its indexes) is read from
+# start to finish: "Seq Scan" on PostgreSQL, "SCAN" rather than "SEARCH" on
+# SQLite
+FULL_SCAN_REGEX = re.compile(r'Seq Scan on (\w+)|\bSCAN (?:TABLE )?(\w+)')
+
+class Command(BaseCommand):
+    help = 'Runs EXPLAIN on the queries behind the events pages and reports full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans', action='store_true', help='Print the full plan of every query')
+
+    def handle(self, *args, **kwargs):
+        today = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+        month_start, month_end = month_bounds(today.year, today.month)
+        grid_start = month_start - timedelta(days=(month_start.weekday() + 1) % 7)
+
+        location = Location.objects.first()
+        neighborhood = Neighborhood.objects.first()
+        location_id = location.id if location else 0
+        neighborhood_id = neighborhood.id if neighborhood else 0
+
+        queries = [
+            ('calendar', Event.objects.window(today, grid_start + timedelta(days=42))),
+            ('by_date', Event.objects.window(today, month_end)),
+            ('by_location', Event.objects.window(today, month_end)),
+            ('virtual series', RecurringEvent.objects.virtual_series(today, month_end)),
+            ('exceptions', RecurrenceException.objects.filter(info_id=0, date_start__gte=today, date_start__lt=month_end)),
+            ('location', Event.objects.window(today, location_id=location_id)[:10]),
+            ('neighborhood', Event.objects.window(today, location__neighborhood_id=neighborhood_id)[:10]),
+            ('next occurrence', RecurringEvent.objects.filter(info_id=0, date_start__gt=today).order_by('date_start')[:1]),
+        ]
+
+        # gather plans
+        rows = []
+        for name, queryset in queries:
+            plan = queryset.explain()
+            scans = sorted({x or y for x, y in FULL_SCAN_REGEX.findall(plan)})
+            rows.append((name, ', '.join(scans) if scans else 'index only'))
+
+            if kwargs['plans']:
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.stdout.write(plan)
+
+        # table member widths
+        width_name = max(len(x[0]) for x in rows) + 2
+        width_scans = max(len(x[1]) for x in rows + [('', 'Full scans')]) + 2
+
+        # top line of table
+        self.stdout.write('┌{}┬{}┐'.format('─' * width_name, '─' * width_scans))
+
+        # table header
+        self.stdout.write('│{:^{width_name}}│{:^{width_scans}}│'.format('Query', 'Full scans', width_name=width_name, width_scans=width_scans))
+
+        # header/body divider
+        self.stdout.write('╞{}╪{}╡'.format('═' * width_name, '═' * width_scans))
+
+        # body
+        for name, scans in rows:
+            self.stdout.write('│{:^{width_name}}│{:^{width_scans}}│'.format(name, scans, width_name=width_name, width_scans=width_scans))
+
+        # bottom line of table
+        self.stdout.write('└{}┴{}┘'.format('─' * width_name, '─' * width_scans))
+
+        full_scans = sum(1 for x in rows if x[1] != 'index only')
+        if full_scans:
+            self.stdout.write(self.style.WARNING('{} of {} quer{} still read{} a whole table on {}.'.format(
+                full_scans, len(rows), 'y' if full_scans == 1 else 'ies', 's' if full_scans == 1 else '', connection.vendor)))
+        else:
+            self.stdout.write(self.style.SUCCESS('All {} queries use an index on {}.'.format(len(rows), connection.vendor)))
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events import ical
+from locations.models import Location
+
+class Command(BaseCommand):
+    help = 'Imports events from iCalendar (.ics) files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='.ics files to import')
+        parser.add_argument('--category', type=int, default=0, choices=[category for category, name in Location.CATEGORY_CHOICES], help='Category of locations created by the import')
+
+    def handle(self, *args, **kwargs):
+        results = []
+
+        for path in kwargs['paths']:
+            start = time.monotonic()
+
+            try:
+                with open(path, encoding='utf-8-sig', newline='') as f:
+                    counts = ical.import_calendar(f, kwargs['category'])
+            except OSError as e:
+                raise CommandError('Could not read %s: %s' % (path, e.strerror))
+
+            results.append((path, counts, time.monotonic() - start))
+
+        # table member widths
+        width_path = max(len(path) for path, counts, seconds in results) + 2
+        width_count = 10
+
+        # top line of table
+        self.stdout.write('┌{}┬{}┬{}┬{}┬{}┐'.format('─' * width_path, *['─' * width_count] * 4))
+
+        # table header
+        self.stdout.write('│{:^{width_path}}│{:^{width_count}}│{:^{width_count}}│{:^{width_count}}│{:^{width_count}}│'.format('File', 'Created', 'Updated', 'Skipped', 'Seconds', width_path=width_path, width_count=width_count))
+
+        # header/body divider
+        self.stdout.write('╞{}╪{}╪{}╪{}╪{}╡'.format('═' * width_path, *['═' * width_count] * 4))
+
+        # body
+        for path, counts, seconds in results:
+            self.stdout.write('│{:^{width_path}}│{:^{width_count}}│{:^{width_count}}│{:^{width_count}}│{:^{width_count}.2f}│'.format(path, counts['created'], counts['updated'], counts['skipped'], seconds, width_path=width_path, width_count=width_count))
+
+        # bottom line of table
+        self.stdout.write('└{}┴{}┴{}┴{}┴{}┘'.format('─' * width_path, *['─' * width_count] * 4))
+
+        # success message
+        self.stdout.write(self.style.SUCCESS('Successfully imported {} file{}.'.format(len(results), '' if len(results) == 1 else 's')))
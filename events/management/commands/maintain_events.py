@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from events.cache import invalidate_between
+from events.models import Event, RecurringEvent, RepeatInfo, RecurrenceException, Tombstone
+from events.signals import bulk_delete
+from mtm.settings import TZ, EVENTS_TOMBSTONE_DAYS
+
+class Command(BaseCommand):
+    help = 'Deletes past events and extends open-ended recurring series to a look-ahead horizon'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-days', type=int, default=0, help='Keep events that ended within this many days')
+        parser.add_argument('--horizon-days', type=int, default=365, help='Keep open-ended series generated this many days ahead')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows deleted per transaction')
+
+    def handle(self, *args, **kwargs):
+        today = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+        cutoff = today - timedelta(days=kwargs['keep_days'])
+        horizon = today + timedelta(days=kwargs['horizon_days'])
+        batch_size = kwargs['batch_size']
+
+        # Series are extended first so that one whose rows are all in the
+        # past still has an occurrence to continue from
+        infos = RepeatInfo.objects.filter(
+            virtual=False,
+            ends=0,
+            frequency_units__gt=0,
+        )
+
+        extended = 0
+        created = 0
+        for info in infos.iterator(chunk_size=batch_size):
+            events = RecurringEvent.objects.extend(info, horizon)
+
+            if events:
+                extended += 1
+                created += len(events)
+                self.stdout.write('Extended series {} by {} occurrence{}.'.format(info.id, len(events), '' if len(events) == 1 else 's'))
+
+        # Past rows go in bounded batches so no transaction holds its locks
+        # for long; a run that is interrupted picks up where it stopped
+        past = Event.objects.filter(
+            Q(date_end__lt=cutoff) | Q(date_end__isnull=True, date_start__lt=cutoff),
+        )
+
+        # Clients drop events that ended before the change feed's window on
+        # their own, so only rows newer than that get tombstones
+        feed_start = today - timedelta(days=EVENTS_TOMBSTONE_DAYS)
+
+        deleted = 0
+        date_first = date_last = None
+        while True:
+            rows = list(past.order_by('date_start').values_list('id', 'date_start', 'date_end')[:batch_size])
+            if not rows:
+                break
+
+            ids = [id for id, date_start, date_end in rows]
+
+            with transaction.atomic(), bulk_delete():
+                Event.objects.filter(id__in=ids).delete()
+                Tombstone.objects.bulk_create([
+                    Tombstone(event_id=id)
+                    for id, date_start, date_end in rows if (date_end or date_start) >= feed_start
+                ])
+
+            # Batches come in start order, so the first row opens the range
+            date_first = date_first or rows[0][1]
+            date_last = max([date_end or date_start for id, date_start, date_end in rows] + ([date_last] if date_last else []))
+
+            deleted += len(ids)
+            self.stdout.write('Deleted {} past event{} ({} so far).'.format(len(ids), '' if len(ids) == 1 else 's', deleted))
+
+        # One invalidation covers every purged month
+        if deleted:
+            invalidate_between(date_first, date_last)
+
+        exceptions = 0
+        while True:
+            ids = list(RecurrenceException.objects.filter(date_start__lt=cutoff).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+
+            RecurrenceException.objects.filter(id__in=ids).delete()
+            exceptions += len(ids)
+
+        # Stored series with nothing left to show or continue from
+        empty_series = RepeatInfo.objects.filter(
+            virtual=False,
+            event__isnull=True,
+        ).delete()[1].get('events.RepeatInfo', 0)
+
+        # Clients further behind than this start over from a full download
+        tombstones = Tombstone.objects.filter(
+            date_deleted__lt=feed_start,
+        ).delete()[0]
+
+        rows = [
+            ('Series extended', extended),
+            ('Occurrences created', created),
+            ('Past events deleted', deleted),
+            ('Past exceptions deleted', exceptions),
+            ('Empty series deleted', empty_series),
+            ('Tombstones deleted', tombstones),
+        ]
+
+        # table member widths
+        width_task = max(len(task) for task, count in rows) + 2
+        width_count = max(len('Rows'), *(len(str(count)) for task, count in rows)) + 2
+
+        # top line of table
+        self.stdout.write('┌{}┬{}┐'.format('─' * width_task, '─' * width_count))
+
+        # table header
+        self.stdout.write('│{:^{width_task}}│{:^{width_count}}│'.format('Task', 'Rows', width_task=width_task, width_count=width_count))
+
+        # header/body divider
+        self.stdout.write('╞{}╪{}╡'.format('═' * width_task, '═' * width_count))
+
+        # body
+        for task, count in rows:
+            self.stdout.write('│ {:<{width_task}}│{:^{width_count}}│'.format(task, count, width_task=width_task - 1, width_count=width_count))
+
+        # bottom line of table
+        self.stdout.write('└{}┴{}┘'.format('─' * width_task, '─' * width_count))
+
+        # success message
+        self.stdout.write(self.style.SUCCESS('Events are up to date through {}.'.format(horizon.strftime('%m/%d/%Y'))))
@@ -1,9 +1,18 @@
+import hashlib
 import pytz
 
+from bisect import bisect_left
 from datetime import date, datetime, timedelta
+from dateutil import rrule
 from dateutil.relativedelta import relativedelta
-from django.db import models
-from django.db.models import Q
+from itertools import chain, islice
+from operator import attrgetter
+from django.db import models, transaction
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Coalesce, Greatest
+from django.utils.dateformat import format as date_format
+from django.utils.dateparse import parse_date, parse_datetime
+from slugify import slugify
 
 from mtm.settings import TZ
 
@@ -38,22 +47,149 @@ DOW = [
     },
 ]
 
+# Highest daily event count shown at each heatmap level; busier days get
+# the level above the last one
+HEAT_LEVELS = [0, 1, 3, 6]
+
+WEEKDAYS = [
+    'monday',
+    'tuesday',
+    'wednesday',
+    'thursday',
+    'friday',
+    'saturday',
+    'sunday',
+]
+
+def month_bounds(year, month):
+    month_start = TZ.localize(datetime(year, month, 1))
+    month_end = TZ.localize(datetime(year, month, 1) + relativedelta(months=+1))
+
+    return (month_start, month_end)
+
+# Pages of events are ordered by (date_start, id); occurrences expanded from
+# a virtual series have no row, so their series stands in for the ID
+def sort_key(event):
+    return (event.date_start, event.id if event.id else -event.info_id)
+
+def encode_cursor(event):
+    return format_cursor(*sort_key(event))
+
+def format_cursor(date, id):
+    return '%s_%d' % (date.astimezone(pytz.utc).strftime('%Y%m%d%H%M%S%f'), id)
+
+def decode_cursor(cursor):
+    try:
+        date_start, id = cursor.split('_')
+        return (pytz.utc.localize(datetime.strptime(date_start, '%Y%m%d%H%M%S%f')), int(id))
+    except (AttributeError, ValueError):
+        return None
+
+# The change feed keeps a (date, id) position in each of its streams:
+# events, tombstones and virtual series
+def format_changes_cursor(positions):
+    return '.'.join(format_cursor(*position) for position in positions)
+
+def decode_changes_cursor(cursor):
+    positions = [decode_cursor(part) for part in cursor.split('.')]
+
+    if None in positions or len(positions) != 3:
+        return None
+
+    return positions
+
+def describe_conflicts(location, events, limit=5):
+    descriptions = []
+    for event in events[:limit]:
+        date_start = event.date_start.astimezone(TZ)
+        date_end = event.date_end.astimezone(TZ) if event.date_end else None
+
+        descriptions.append('%s (%s%s)' % (
+            event.name,
+            date_format(date_start, 'D. n/j/y g:i a'),
+            '–' + date_format(date_end, 'g:i a') if date_end else '',
+        ))
+
+    if len(events) > limit:
+        descriptions.append('%d more' % (len(events) - limit))
+
+    return '%s is already booked at %s: %s.' % (
+        location.name,
+        'this time' if len(events) == 1 else 'these times',
+        '; '.join(descriptions),
+    )
+
+RRULE_FREQUENCIES = {
+    1: rrule.DAILY,
+    2: rrule.WEEKLY,
+    3: rrule.MONTHLY,
+    4: rrule.YEARLY,
+}
+
+# Stored rows, virtual expansions, previews and conflict checks all come
+# from this rule, so a series is the same schedule whichever way it is kept.
+# Rules run on local wall-clock time so occurrences keep their hour across
+# daylight saving changes.
+def series_rule(dtstart, frequency, frequency_units, weekdays=None, until=None, count=None):
+    kwargs = {}
+
+    if weekdays:
+        kwargs['byweekday'] = weekdays
+
+    if until:
+        kwargs['until'] = until
+    elif count is not None:
+        kwargs['count'] = count
+
+    return rrule.rrule(
+        RRULE_FREQUENCIES[frequency_units],
+        interval=frequency,
+        dtstart=dtstart,
+        **kwargs
+    )
+
+# Yields the (start, end) local datetimes of every occurrence of a series,
+# up to a year out unless capped is False, without touching the database
+def generate_occurrences(date_start, frequency, frequency_units, ends, date_end=None, weekday_list=None, ends_on=None, ends_after=0, capped=True):
+    start = date_start.astimezone(TZ).replace(tzinfo=None)
+    duration = date_end.astimezone(TZ).replace(tzinfo=None) - start if date_end else None
+
+    # Limits are compared on wall-clock time so that only the occurrences
+    # that are kept have to be localized
+    date_max = start + relativedelta(years=+1) if capped else None
+
+    rule = series_rule(
+        start,
+        frequency,
+        frequency_units,
+        weekdays=[WEEKDAYS.index(weekday) for weekday in weekday_list] if weekday_list else None,
+        until=ends_on.astimezone(TZ).replace(tzinfo=None) if ends == 1 else None,
+        count=ends_after if ends == 2 else None,
+    )
+
+    for date in rule:
+        if date_max and date > date_max:
+            break
+
+        yield (TZ.localize(date), TZ.localize(date + duration) if duration is not None else None)
+
 class EventManager(models.Manager):
     def event(self, category_slug, location_slug, event_slug, event_id):
         from .models import Event, RecurringEvent
         from locations.models import CATEGORIES, Location
-        from images.models import Image, Album
+        from images.models import Image
 
+        # Resolve the event, its series, location and album in one query
         try:
-            event = RecurringEvent.objects.get(id=event_id)
-            recurring = True
-        except RecurringEvent.DoesNotExist:
-            try:
-                event = Event.objects.get(id=event_id)
-            except Event.DoesNotExist:
-                return (False, {'status': 'invalid ID'})
+            event = Event.objects.select_related(
+                'location__neighborhood',
+                'album',
+                'info',
+            ).get(id=event_id)
+        except Event.DoesNotExist:
+            return (False, {'status': 'invalid ID'})
 
-            recurring = False
+        recurring = event.info_id is not None
 
         _category_slug = CATEGORIES[event.location.category] if event.location else 'events'
         _location_slug = event.location.slug if event.location else 'undefined'
@@ -68,14 +204,26 @@ class EventManager(models.Manager):
             })
 
         if recurring:
-            next_event = RecurringEvent.objects.filter(
+            next_event = RecurringEvent.objects.select_related('location').filter(
                 info=event.info,
                 date_start__gt=event.date_start,
             ).order_by('date_start').first()
+
+            # Edited occurrences of a virtual series are followed by
+            # occurrences that only exist in the rule
+            if event.info.virtual:
+                next_events = RecurringEvent.objects.expand(
+                    event.date_start + timedelta(microseconds=1),
+                    limit=1,
+                    id=event.info_id,
+                )
+
+                if next_events and (not next_event or next_events[0].date_start < next_event.date_start):
+                    next_event = next_events[0]
         else:
             next_event = None
 
-        images = Image.objects.filter(album=event.album) if event.album else None
+        images_preview, images_count = Image.objects.preview(event.album) if event.album else (None, 0)
 
         return (True, {
             'event': event,
@@ -83,7 +231,8 @@ class EventManager(models.Manager):
             'category_name': Location.CATEGORY_CHOICES[event.location.category][1] if event.location else 'Miscellaneous',
             'category_slug': _category_slug,
             'recurring': recurring,
-            'images_preview': images[:14] if images and len(images) > 15 else images,
+            'images_preview': images_preview,
+            'images_count': images_count,
         })
 
     def create_event(self, request):
@@ -107,9 +256,11 @@ class EventManager(models.Manager):
         location_name = request.POST.get('location-name', '')
         album_id = request.POST.get('album-id', '0')
         album_name = request.POST.get('location-name', '')
+        virtual_value = request.POST.get('virtual', '')
 
         # Data restructuring
         all_day = all_day_value == 'true'
+        virtual = virtual_value == 'true'
 
         if frequency:
             frequency = int(frequency)
@@ -214,6 +365,27 @@ class EventManager(models.Manager):
         if errors:
             return (False, errors)
 
+        # Every occurrence of a new series is checked against the venue at once
+        if frequency_units == 0:
+            intervals = [] if all_day else [(date_start, date_end if date_end_str else None)]
+        elif all_day and not date_end_str:
+            intervals = []
+        else:
+            intervals = list(generate_occurrences(
+                date_start,
+                frequency,
+                frequency_units,
+                ends,
+                date_end=date_end if date_end_str else None,
+                weekday_list=weekday_list,
+                ends_on=ends_on.replace(hour=23, minute=59, second=59, microsecond=999999) if ends == 1 else None,
+                ends_after=ends_after,
+            ))
+
+        conflicts = self.conflicts(location, intervals)
+        if conflicts:
+            return (False, [describe_conflicts(location, conflicts)])
+
         # Gather arguments and create event
         kwargs = {}
         if all_day:
@@ -246,6 +418,9 @@ class EventManager(models.Manager):
             elif ends == 2:
                 kwargs['ends_after'] = ends_after
 
+            if virtual:
+                kwargs['virtual'] = virtual
+
             events = RecurringEvent.objects.create_recurring_event(
                 name=name,
                 date_start=date_start,
@@ -255,7 +430,10 @@ class EventManager(models.Manager):
                 **kwargs
             )
 
-            events_len = len(events)
+            if virtual:
+                return (True, 'You have successfully created a recurring series.')
+
+            events_len = events.count()
             return (True, 'You have successfully created %d event%s.' %
                 (events_len, '' if events_len == 1 else 's'))
 
@@ -277,6 +455,39 @@ class EventManager(models.Manager):
 
         return event
 
+    def import_events(self, request):
+        from locations.models import Location
+        from . import ical
+
+        calendar = request.FILES.get('calendar')
+        category = request.POST.get('category', '0')
+
+        errors = []
+
+        if not calendar:
+            errors.append('Please choose an .ics file to import.')
+
+        try:
+            category = int(category)
+            Location.CATEGORY_CHOICES[category]
+        except (ValueError, IndexError):
+            errors.append('Please choose a category for new locations.')
+
+        if errors:
+            return (False, errors)
+
+        # Uploaded files are read line by line as the import goes
+        try:
+            counts = ical.import_calendar(calendar, category)
+        except UnicodeDecodeError:
+            return (False, ['The uploaded file is not a valid .ics file.'])
+
+        return (True, 'Import complete: %d created, %d updated, %d skipped.' % (
+            counts['created'],
+            counts['updated'],
+            counts['skipped'],
+        ))
+
     def update_event(self, request):
         from .models import Event, RecurringEvent
         from locations.models import Location, CATEGORIES
@@ -338,15 +549,13 @@ class EventManager(models.Manager):
 
         if errors:
             try:
-                event = RecurringEvent.objects.get(id=event_id)
-            except RecurringEvent.DoesNotExist:
-                try:
-                    event = Event.objects.get(id=event_id)
-                except Event.DoesNotExist:
-                    return (False, {
-                        'errors': errors,
-                        'event_found': False,
-                    })
+                event = Event.objects.get(id=event_id)
+            except Event.DoesNotExist:
+                return (False, {
+                    'errors': errors,
+                    'event_found': False,
+                })
+
             return (False, {
                 'errors': errors,
                 'event_found': True,
@@ -359,75 +568,85 @@ class EventManager(models.Manager):
             })
 
         # Find event(s) and update
-        if update == 'multiple-events':
-            # Find recurring events and update
-            event = RecurringEvent.objects.get(id=event_id)
+        try:
+            event = Event.objects.get(id=event_id)
+        except Event.DoesNotExist:
+            return (False, {
+                'errors': ['The specified event could not be found.'],
+                'event_found': False,
+            })
+
+        if update == 'multiple-events' and isinstance(event, RecurringEvent):
             return RecurringEvent.objects.update_recurring_event(request, event.info)
-        else:
-            try:
-                # Find single event
-                event = Event.objects.get(id=event_id)
 
-                # Update event
-                if name:
-                    event.name = name
+        # Update event
+        if name:
+            event.name = name
 
-                if description:
-                    event.description = description
-                event.all_day = all_day
+        if description:
+            event.description = description
+        event.all_day = all_day
 
-                event.date_start = date_start
+        event.date_start = date_start
 
-                if date_end_str:
-                    event.date_end = date_end
-
-                # Grab location object or set to None
-                if location_id <= 0 or location_name == '':
-                    location = None
-                elif location_id > 0:
-                    try:
-                        location = Location.objects.get(id=location_id)
-                    except Location.DoesNotExist:
-                        return (False, {
-                            'errors': ['The specified location could not be found.'],
-                            'event_found': True,
-                            'args': [
-                                CATEGORIES[event.location.category] if event.location else 'events',
-                                event.location.slug if event.location else 'undefined',
-                                event.slug,
-                                event.id,
-                            ],
-                        })
-
-                event.location = location
-
-                # Grab album object or set to None
-                if album_id <= 0 or album_name == '':
-                    album = None
-                elif album_id > 0:
-                    try:
-                        album = Album.objects.get(id=album_id)
-                    except Album.DoesNotExist:
-                        return (False, {
-                            'errors': ['The specified album could not be found.'],
-                            'event_found': True,
-                            'args': [
-                                CATEGORIES[event.location.category] if event.location else 'events',
-                                event.location.slug if event.location else 'undefined',
-                                event.slug,
-                                event.id,
-                            ],
-                        })
-
-                event.album = album
-
-                event.save()
-            except Event.DoesNotExist:
+        if date_end_str:
+            event.date_end = date_end
+
+        # Grab location object or set to None
+        if location_id <= 0 or location_name == '':
+            location = None
+        elif location_id > 0:
+            try:
+                location = Location.objects.get(id=location_id)
+            except Location.DoesNotExist:
                 return (False, {
-                    'errors': ['The specified event could not be found.'],
-                    'event_found': False,
+                    'errors': ['The specified location could not be found.'],
+                    'event_found': True,
+                    'args': [
+                        CATEGORIES[event.location.category] if event.location else 'events',
+                        event.location.slug if event.location else 'undefined',
+                        event.slug,
+                        event.id,
+                    ],
+                })
+
+        event.location = location
+
+        # Grab album object or set to None
+        if album_id <= 0 or album_name == '':
+            album = None
+        elif album_id > 0:
+            try:
+                album = Album.objects.get(id=album_id)
+            except Album.DoesNotExist:
+                return (False, {
+                    'errors': ['The specified album could not be found.'],
+                    'event_found': True,
+                    'args': [
+                        CATEGORIES[event.location.category] if event.location else 'events',
+                        event.location.slug if event.location else 'undefined',
+                        event.slug,
+                        event.id,
+                    ],
                 })
 
+        event.album = album
+
+        conflicts = [] if event.all_day else self.conflicts(location, [(event.date_start, event.date_end)], event=event)
+        if conflicts:
+            return (False, {
+                'errors': [describe_conflicts(location, conflicts)],
+                'event_found': True,
+                'args': [
+                    CATEGORIES[event.location.category] if event.location else 'events',
+                    event.location.slug if event.location else 'undefined',
+                    event.slug,
+                    event.id,
+                ],
+            })
+
+        event.save()
+
         return (True, {
             'success': 'You have successfully updated 1 event.',
             'args': [
@@ -449,20 +668,18 @@ class EventManager(models.Manager):
         if delete != 'single-event' and delete != 'multiple-events':
             errors.append('Please choose which instances will be deleted.')
 
-        event_found = True
         try:
-            event = RecurringEvent.objects.get(id=event_id)
-        except RecurringEvent.DoesNotExist:
-            try:
-                event = Event.objects.get(id=event_id)
-            except Event.DoesNotExist:
-                errors.append('The specified event could not be found.')
-                event_found = False
+            event = Event.objects.get(id=event_id)
+        except Event.DoesNotExist:
+            return (False, {
+                'errors': errors + ['The specified event could not be found.'],
+                'event_found': False,
+            })
 
         if errors:
             return (False, {
                 'errors': errors,
-                'event_found': event_found,
+                'event_found': True,
                 'args': [
                     CATEGORIES[event.location.category] if event.location else 'events',
                     event.location.slug if event.location else 'undefined',
@@ -471,7 +688,7 @@ class EventManager(models.Manager):
                 ],
             })
 
-        if delete == 'multiple-events':
+        if delete == 'multiple-events' and isinstance(event, RecurringEvent):
             events = RecurringEvent.objects.filter(
                 info=event.info,
                 date_start__gte=event.date_start,
@@ -479,6 +696,13 @@ class EventManager(models.Manager):
 
             events_len = len(events)
             events.delete()
+
+            # Virtual series stop producing occurrences from this one on
+            if event.info.virtual:
+                event.info.ends = 1
+                event.info.ends_on = event.date_start - timedelta(microseconds=1)
+                event.info.save()
+
             return (True, {
                 'success': 'You have successfully deleted %d event%s.' % (events_len, '' if events_len == 1 else 's'),
             })
@@ -487,36 +711,482 @@ class EventManager(models.Manager):
 
         return (True, {'success': 'You have successfully deleted 1 event.'})
 
-    def calendar(self, request):
+    def changes(self, request):
+        from . import ical
+        from .models import Event, RepeatInfo, Tombstone
+        from mtm.settings import EVENT_CHANGES_PER_PAGE, EVENTS_TOMBSTONE_DAYS
+
+        now = datetime.now(TZ)
+
+        # Either a cursor from a previous response or a plain timestamp
+        since = request.GET.get('since', '')
+        positions = decode_changes_cursor(since)
+        if not positions:
+            try:
+                date = parse_datetime(since) or datetime.combine(parse_date(since), datetime.min.time())
+            except (TypeError, ValueError):
+                return (False, {'status': 'invalid since'})
+
+            positions = [(date if date.tzinfo else TZ.localize(date), 0)] * 3
+
+        # Deletions older than the tombstones that are kept cannot be
+        # replayed
+        if min(date for date, id in positions) < now - timedelta(days=EVENTS_TOMBSTONE_DAYS):
+            return (False, {'status': 'expired'})
+
+        # Every stream resumes strictly after its own (date, id) position, so
+        # rows stamped in the same instant are neither repeated nor skipped
+        def after(field, position):
+            date, id = position
+            return Q(**{field + '__gt': date}) | Q(**{field: date, 'id__gt': id})
+
+        events_position, tombstones_position, series_position = positions
+
+        events = list(Event.objects.select_related('location').filter(
+            after('date_updated', events_position),
+        ).order_by('date_updated', 'id')[:EVENT_CHANGES_PER_PAGE + 1])
+
+        # A full page ends the window at its last row; deletions and series
+        # are read up to the same instant
+        more = len(events) > EVENT_CHANGES_PER_PAGE
+        events = events[:EVENT_CHANGES_PER_PAGE]
+
+        tombstones = Tombstone.objects.filter(after('date_deleted', tombstones_position))
+        series = RepeatInfo.objects.filter(virtual=True).annotate(
+            changed=Greatest(Coalesce(Max('recurrenceexception__date_updated'), 'date_updated'), 'date_updated'),
+        ).filter(
+            after('changed', series_position),
+        ).select_related('location').prefetch_related('weekday_set', 'recurrenceexception_set')
+
+        if more:
+            tombstones = tombstones.filter(date_deleted__lte=events[-1].date_updated)
+            series = series.filter(changed__lte=events[-1].date_updated)
+
+        tombstones = list(tombstones.order_by('date_deleted', 'id'))
+        series = list(series.order_by('changed', 'id'))
+
+        next_cursor = format_changes_cursor([
+            (events[-1].date_updated, events[-1].id) if events else events_position,
+            (tombstones[-1].date_deleted, tombstones[-1].id) if tombstones else tombstones_position,
+            (series[-1].changed, series[-1].id) if series else series_position,
+        ])
+
+        def location(item):
+            return {
+                'id': item.location.id,
+                'name': item.location.name,
+                'neighborhood_id': item.location.neighborhood_id,
+            } if item.location else None
+
+        return (True, {
+            'since': since,
+            'next': next_cursor,
+            'more': more,
+            'events': [
+                {
+                    'id': event.id,
+                    'info_id': event.info_id,
+                    'name': event.name,
+                    'url': event.get_absolute_url(),
+                    'description': event.description,
+                    'all_day': event.all_day,
+                    'date_start': event.date_start.astimezone(TZ).isoformat(),
+                    'date_end': event.date_end.astimezone(TZ).isoformat() if event.date_end else None,
+                    'location': location(event),
+                    'date_updated': event.date_updated.isoformat(),
+                }
+                for event in events
+            ],
+            'series': [
+                {
+                    'id': info.id,
+                    'name': info.name,
+                    'description': info.description,
+                    'all_day': info.all_day,
+                    'date_start': info.date_start.astimezone(TZ).isoformat(),
+                    'date_end': info.date_end.astimezone(TZ).isoformat() if info.date_end else None,
+                    'rrule': ical.rrule_property(info, info.all_day),
+                    'exdates': [exception.date_start.astimezone(TZ).isoformat() for exception in info.recurrenceexception_set.all()],
+                    'location': location(info),
+                    'date_updated': info.changed.isoformat(),
+                }
+                for info in series
+            ],
+            'deleted': [tombstone.event_id for tombstone in tombstones if tombstone.event_id],
+            'deleted_series': [tombstone.info_id for tombstone in tombstones if tombstone.info_id],
+        })
+
+    def update_local_dates(self, **filters):
+        from .models import Event
+
+        # Set-based updates that move events leave their local dates behind;
+        # only the rows whose dates moved to another day are written
+        events = []
+        for event in Event.objects.filter(**filters).only('id', 'date_start', 'date_end', 'local_date', 'local_end_date'):
+            local_dates = (event.local_date, event.local_end_date)
+            event.set_local_dates()
+
+            if (event.local_date, event.local_end_date) != local_dates:
+                events.append(event)
+
+        if events:
+            Event.objects.bulk_update(events, ['local_date', 'local_end_date'], batch_size=500)
+
+    def window(self, date_from, date_to=None, **filters):
         from .models import Event
 
+        events = Event.objects.select_related('location').filter(
+            date_start__gte=date_from,
+            **filters
+        )
+
+        if date_to:
+            events = events.filter(date_start__lt=date_to)
+
+        return events.order_by('date_start')
+
+    def keyset(self, date_from, date_to, cursor, size, condition=None, **filters):
+        from .models import RecurringEvent
+
+        events = self.window(date_from, date_to, **filters)
+        virtual_from = date_from
+
+        if condition:
+            events = events.filter(condition)
+
+        # Seek past the last event of the previous page instead of counting
+        # rows to skip, so every page costs the same
+        if cursor:
+            date_start, id = cursor
+            events = events.filter(Q(date_start__gt=date_start) | Q(date_start=date_start, id__gt=id))
+            virtual_from = max(date_from, date_start)
+
+        events = list(events.order_by('date_start', 'id')[:size + 1])
+
+        virtual_events = [
+            event for event in RecurringEvent.objects.expand(virtual_from, date_to, size + 2, condition, **filters)
+            if not cursor or sort_key(event) > cursor
+        ]
+
+        if virtual_events:
+            events = sorted(chain(events, virtual_events), key=sort_key)[:size + 1]
+
+        if len(events) > size:
+            return (events[:size], encode_cursor(events[size - 1]))
+
+        return (events, None)
+
+    def page(self, request, date_from, date_to=None, size=None, condition=None, **filters):
+        from mtm.settings import EVENTS_PER_PAGE
+
+        return self.keyset(
+            date_from,
+            date_to,
+            decode_cursor(request.GET.get('after')),
+            size or EVENTS_PER_PAGE,
+            condition,
+            **filters
+        )
+
+    def search(self, request):
+        from . import holidays
+        from .models import RecurringEvent
+        from locations.models import Location, Neighborhood, CATEGORIES
+        from mtm.settings import NEWS_ITEMS_PER_PAGE
+
         today = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
-        year = int(request.GET.get('year', today.year))
-        month = int(request.GET.get('month', today.month))
 
-        date = first_of_month = datetime(year, month, 1, tzinfo=TZ)
+        # Unreadable values are ignored rather than rejected
+        def parse_date(value):
+            try:
+                return TZ.localize(datetime.strptime(value, '%Y-%m-%d'))
+            except (TypeError, ValueError):
+                return None
+
+        def parse_id(value):
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return None
+
+        date_from = parse_date(request.GET.get('from')) or today
+        date_to = parse_date(request.GET.get('to'))
+        if date_to:
+            date_to = TZ.localize(date_to.replace(tzinfo=None) + timedelta(days=1))
+
+        neighborhood_id = parse_id(request.GET.get('neighborhood'))
+        category = request.GET.get('category', '')
+        kind = request.GET.get('kind', '')
+        query = request.GET.get('q', '').strip()
+
+        # Facets are counted over every filter except their own
+        filters = {}
+        condition = None
+
+        if kind == 'all-day':
+            filters['all_day'] = True
+
+        if query:
+            condition = Q(name__icontains=query) | Q(location__name__icontains=query)
+
+        facet_filters = dict(filters)
+
+        if neighborhood_id:
+            filters['location__neighborhood_id'] = neighborhood_id
+
+        category_id = CATEGORIES.index(category) if category in CATEGORIES else None
+        if category_id is not None:
+            filters['location__category'] = category_id
+
+        counts = {}
+
+        # Holidays are computed, have no location and fit on one page
+        if kind == 'holiday':
+            events = [
+                holiday for holiday in holidays.between(date_from, date_to or date_from + relativedelta(years=+1))
+                if query.lower() in holiday.name.lower()
+            ]
+            next_cursor = None
+        else:
+            events, next_cursor = self.page(request, date_from, date_to, NEWS_ITEMS_PER_PAGE, condition, **filters)
+
+            facets = self.filter(date_start__gte=date_from, **facet_filters)
+            if date_to:
+                facets = facets.filter(date_start__lt=date_to)
+            if condition:
+                facets = facets.filter(condition)
+
+            for row in facets.values('location__neighborhood_id', 'location__category').annotate(count=Count('id')).order_by():
+                key = (row['location__neighborhood_id'], row['location__category'])
+                counts[key] = counts.get(key, 0) + row['count']
+
+            # Virtual series are counted up to a year out, the same horizon
+            # stored series are generated to
+            for event in RecurringEvent.objects.expand(
+                date_from,
+                date_to or date_from + relativedelta(years=+1),
+                None,
+                condition,
+                **facet_filters
+            ):
+                key = (event.location.neighborhood_id, event.location.category) if event.location else (None, None)
+                counts[key] = counts.get(key, 0) + 1
+
+        def url(**changes):
+            params = request.GET.copy()
+            params.pop('after', None)
+
+            for key, value in changes.items():
+                if value is None:
+                    params.pop(key, None)
+                else:
+                    params[key] = value
+
+            return '?' + params.urlencode()
+
+        neighborhoods = Neighborhood.objects.in_bulk([key[0] for key in counts if key[0]])
+        neighborhood_counts = {}
+        category_counts = {}
+        for (neighborhood, location_category), count in counts.items():
+            if neighborhood and (category_id is None or location_category == category_id):
+                neighborhood_counts[neighborhood] = neighborhood_counts.get(neighborhood, 0) + count
+            if location_category is not None and (not neighborhood_id or neighborhood == neighborhood_id):
+                category_counts[location_category] = category_counts.get(location_category, 0) + count
+
+        return {
+            'events': events,
+            'next': url(after=next_cursor) if next_cursor else None,
+            'query': query,
+            'date_from': date_from,
+            'date_to': date_to - timedelta(days=1) if date_to else None,
+            'neighborhood_id': neighborhood_id,
+            'category': category,
+            'kind': kind,
+            'neighborhoods': sorted([
+                {
+                    'id': id,
+                    'name': neighborhoods[id].name,
+                    'count': count,
+                    'url': url(neighborhood=None if id == neighborhood_id else str(id)),
+                    'active': id == neighborhood_id,
+                }
+                for id, count in neighborhood_counts.items() if id in neighborhoods
+            ], key=lambda facet: (-facet['count'], facet['name'])),
+            'categories': sorted([
+                {
+                    'slug': CATEGORIES[id],
+                    'name': Location.CATEGORY_CHOICES[id][1],
+                    'count': count,
+                    'url': url(category=None if CATEGORIES[id] == category else CATEGORIES[id]),
+                    'active': CATEGORIES[id] == category,
+                }
+                for id, count in category_counts.items()
+            ], key=lambda facet: (-facet['count'], facet['name'])),
+            'all_neighborhoods': Neighborhood.objects.order_by('name'),
+            'all_categories': [
+                {
+                    'slug': CATEGORIES[id],
+                    'name': name,
+                }
+                for id, name in Location.CATEGORY_CHOICES
+            ],
+        }
+
+    def between(self, date_from, date_to, **filters):
+        from .models import RecurringEvent
+
+        events = list(self.window(date_from, date_to, **filters))
+
+        virtual_events = RecurringEvent.objects.expand(date_from, date_to, **filters)
+        if virtual_events:
+            events = sorted(chain(events, virtual_events), key=attrgetter('date_start'))
+
+        return events
+
+    def conflicts(self, location, intervals, event=None, info=None):
+        from .intervals import IntervalTree
+        from .models import Event, RecurringEvent
+
+        # Events without an end only occupy their start time
+        intervals = [(start, end or start + timedelta(microseconds=1)) for start, end in intervals]
+        if not location or not intervals:
+            return []
+
+        date_from = min(start for start, end in intervals)
+        date_to = max(end for start, end in intervals)
+
+        # One range scan of the venue's (location, date_start, date_end)
+        # index; all-day events do not book the venue
+        events = Event.objects.filter(
+            Q(date_start__gte=date_from) | Q(date_end__gt=date_from),
+            location=location,
+            all_day=False,
+            date_start__lt=date_to,
+        ).only('id', 'name', 'date_start', 'date_end')
+
+        if event:
+            events = events.exclude(id=event.id)
+
+        if info:
+            events = events.exclude(info=info)
+
+        virtual_series = RecurringEvent.objects.expand(
+            date_from - timedelta(days=1),
+            date_to,
+            None,
+            ~Q(id=info.id) if info else None,
+            location=location,
+            all_day=False,
+        )
+
+        tree = IntervalTree(
+            (existing.date_start, existing.date_end or existing.date_start + timedelta(microseconds=1), existing)
+            for existing in chain(events, virtual_series)
+        )
+
+        found = {}
+        for start, end in intervals:
+            for _, _, existing in tree.overlapping(start, end):
+                found[sort_key(existing)] = existing
+
+        return [found[key] for key in sorted(found)]
+
+    def live(self, request, date_from, date_to):
+        from . import live
+
+        filters = {}
+        for key, parameter in [('location_id', 'location'), ('neighborhood_id', 'neighborhood')]:
+            try:
+                filters[key] = int(request.GET[parameter])
+            except (KeyError, ValueError):
+                pass
+
+        return {
+            'from': date_from.isoformat(),
+            'to': date_to.isoformat(),
+            'events': live.between(date_from, date_to, **filters),
+        }
+
+    def now(self, request):
+        now = datetime.now(TZ)
+
+        return self.live(request, now, now + timedelta(microseconds=1))
+
+    def tonight(self, request):
+        now = datetime.now(TZ)
+        today = now.replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+
+        # Tonight runs from 5 p.m. to 4 a.m.; after midnight it is still
+        # the night before
+        if now.hour < 4:
+            date_to = TZ.localize(today + timedelta(hours=4))
+        else:
+            date_to = TZ.localize(today + timedelta(days=1, hours=4))
+
+        return self.live(request, max(now, date_to - timedelta(hours=11)), date_to)
+
+    def with_holidays(self, date_from, date_to):
+        from . import holidays
+
+        # Holidays sort ahead of the events that start at midnight
+        return sorted(
+            chain(holidays.between(date_from, date_to), self.between(date_from, date_to)),
+            key=attrgetter('date_start'),
+        )
+
+    def upcoming(self, date_from, limit, **filters):
+        from .models import RecurringEvent
+
+        events = list(self.window(date_from, **filters)[:limit])
+
+        virtual_events = RecurringEvent.objects.expand(date_from, limit=limit, **filters)
+        if virtual_events:
+            events = sorted(chain(events, virtual_events), key=attrgetter('date_start'))[:limit]
+
+        return events
+
+    def calendar(self, request, year=None, month=None):
+        from .cache import month_snapshot
+
+        today = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+        year = year or int(request.GET.get('year', today.year))
+        month = month or int(request.GET.get('month', today.month))
+
+        grid_start = self.grid_start(year, month)
+        cutoff = today if today > grid_start else None
+
+        return month_snapshot('calendar', year, month, cutoff,
+            lambda: self.build_calendar(year, month, today))
+
+    def grid_start(self, year, month):
+        date = datetime(year, month, 1)
+        return TZ.localize(date - timedelta(days=(date.weekday() + 1) % 7))
+
+    def build_calendar(self, year, month, today):
+        first_of_month = datetime(year, month, 1, tzinfo=TZ)
         calendar = []
-        while date.weekday() != 6:
-            date = date - timedelta(days=1)
 
-        for i in range(42):
-            events = Event.objects.filter(
-                date_start__date=date,
-                date_start__gte=today,
-            ).order_by('date_start')[:3]
+        # Fetch the whole 6-week grid window in one pass and bucket the
+        # events by their local date
+        date = grid_start = self.grid_start(year, month)
+        grid_end = TZ.localize(grid_start.replace(tzinfo=None) + timedelta(days=42))
 
-            events_tz_adjusted = []
-            for event in events:
-                event.date_start = event.date_start.astimezone(TZ)
+        events_by_date = {}
+        for event in self.with_holidays(max(grid_start, today), grid_end):
+            event.date_start = event.date_start.astimezone(TZ)
 
-                if event.date_end:
-                    event.date_end = event.date_end.astimezone(TZ)
+            if event.date_end:
+                event.date_end = event.date_end.astimezone(TZ)
 
-                events_tz_adjusted.append(event)
+            events_by_date.setdefault(event.date_start.date(), []).append(event)
+
+        for i in range(42):
+            events = events_by_date.get(date.date(), [])
 
             calendar.append({
                 'date': date,
-                'events': events_tz_adjusted,
+                'events': events[:3],
+                'more': max(len(events) - 3, 0),
                 'row': int(i / 7),
                 'col': i % 7,
             })
@@ -527,131 +1197,242 @@ class EventManager(models.Manager):
             'date': first_of_month,
             'calendar': calendar,
             'days_of_week': DOW,
-            'has_events': Event.objects.filter(
-                Q(date_start__gte=first_of_month)
-                & Q(date_start__lt=(first_of_month + relativedelta(months=1)))
-            ).exists()
+            'has_events': any(date.month == month for date in events_by_date) or any(
+                date.month == month for date in self.year(year)['counts']
+            ),
         }
 
-    def by_date(self, request):
-        from .models import Event
-        from locations.models import CATEGORIES
+    def year(self, year):
+        from .cache import year_snapshot
+
+        return year_snapshot(year, lambda: self.build_year(year))
+
+    def build_year(self, year):
+        from .models import RecurringEvent
+
+        year_start = TZ.localize(datetime(year, 1, 1))
+        year_end = TZ.localize(datetime(year + 1, 1, 1))
+
+        counts = dict(
+            self.filter(local_date__gte=year_start.date(), local_date__lt=year_end.date())
+            .values('local_date')
+            .annotate(count=Count('id'))
+            .order_by('local_date')
+            .values_list('local_date', 'count')
+        )
+
+        for event in RecurringEvent.objects.expand(year_start, year_end):
+            day = event.date_start.astimezone(TZ).date()
+            counts[day] = counts.get(day, 0) + 1
+
+        months = []
+        for month in range(1, 13):
+            first_of_month = date(year, month, 1)
+            days = []
+
+            day = first_of_month
+            while day.month == month:
+                days.append({
+                    'date': day,
+                    'count': counts.get(day, 0),
+                    'level': bisect_left(HEAT_LEVELS, counts.get(day, 0)),
+                })
+
+                day = day + timedelta(days=1)
+
+            months.append({
+                'date': first_of_month,
+                'blanks': range((first_of_month.weekday() + 1) % 7),
+                'days': days,
+                'count': sum(day['count'] for day in days),
+            })
+
+        return {
+            'date': year_start,
+            'counts': counts,
+            'months': months,
+            'days_of_week': DOW,
+            'count': sum(counts.values()),
+        }
+
+    def by_date(self, request, year=None, month=None):
+        from .cache import month_snapshot
 
         today = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
-        year = int(request.GET.get('year', today.year))
-        month = int(request.GET.get('month', today.month))
+        year = year or int(request.GET.get('year', today.year))
+        month = month or int(request.GET.get('month', today.month))
 
-        date = first_of_month = datetime(year, month, 1, tzinfo=TZ)
+        month_start, month_end = month_bounds(year, month)
+        cutoff = today if today > month_start else None
+
+        return month_snapshot('by_date', year, month, cutoff,
+            lambda: self.build_by_date(year, month, today))
+
+    def build_by_date(self, year, month, today):
+        from locations.models import CATEGORIES
+
+        first_of_month = datetime(year, month, 1, tzinfo=TZ)
+        month_start, month_end = month_bounds(year, month)
         calendar = []
 
+        # Group the month's upcoming events by local date in a single pass,
+        # numbering the links as they are encountered
         tabindex = 0
-        while date.month == first_of_month.month:
-            events = []
-            for event in Event.objects.filter(
-                date_start__date=date,
-                date_start__gte=today,
-            ).order_by('date_start'):
-                if not event.all_day or event.location:
-                    if event.location == None:
-                        events.append({
-                            'event': event,
-                            'tabindex': tabindex,
-                        })
-                    else:
-                        events.append({
-                            'event': event,
-                            'category': CATEGORIES[event.location.category] if event.location else 'events',
-                            'tabindex': tabindex,
-                        })
-                    tabindex += 1
+        for event in self.with_holidays(max(month_start, today), month_end):
+            date = event.date_start.astimezone(TZ).date()
+
+            if not calendar or calendar[-1]['date'].date() != date:
+                calendar.append({
+                    'date': TZ.localize(datetime(date.year, date.month, date.day)),
+                    'events': [],
+                })
+
+            events = calendar[-1]['events']
+
+            if not event.all_day or event.location:
+                if event.location == None:
+                    events.append({
+                        'event': event,
+                        'tabindex': tabindex,
+                    })
                 else:
                     events.append({
                         'event': event,
+                        'category': CATEGORIES[event.location.category],
+                        'tabindex': tabindex,
                     })
-
-            if events:
-                calendar.append({
-                    'date': date,
-                    'events': events,
+                tabindex += 1
+            else:
+                events.append({
+                    'event': event,
                 })
 
-            date = date + timedelta(days=1)
-
         return {
             'date': first_of_month,
             'calendar': calendar,
         }
 
-    def by_location(self, request):
-        from .models import Event
-        from locations.models import Location, CATEGORIES
+    def by_location(self, request, year=None, month=None):
+        from .cache import month_snapshot
 
         today = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
-        year = int(request.GET.get('year', today.year))
-        month = int(request.GET.get('month', today.month))
+        year = year or int(request.GET.get('year', today.year))
+        month = month or int(request.GET.get('month', today.month))
+
+        month_start, month_end = month_bounds(year, month)
+        cutoff = today if today > month_start else None
 
-        date = first_of_month = datetime(year, month, 1, tzinfo=TZ)
+        return month_snapshot('by_location', year, month, cutoff,
+            lambda: self.build_by_location(year, month, today))
+
+    def build_by_location(self, year, month, today):
+        from locations.models import CATEGORIES
+
+        first_of_month = datetime(year, month, 1, tzinfo=TZ)
+        month_start, month_end = month_bounds(year, month)
         locations = []
 
-        try:
-            tabindex = self.by_date(request)['calendar'][-1]['events'][-1]['tabindex'] + 1
-        except IndexError:
-            tabindex = 0
-        except KeyError:
-            tabindex = 0
-
-        for location in Location.objects.all().order_by('name'):
-            if Event.objects.filter(
-                location=location,
-                date_start__gte=first_of_month,
-                date_start__lt=first_of_month + relativedelta(months=+1),
-            ):
-                day = first_of_month
-                event_tree = []
-                while day < first_of_month + relativedelta(months=+1):
-                    events_on_day = Event.objects.filter(
-                        location=location,
-                        date_start__gte=day,
-                        date_start__lt=day + timedelta(days=1),
-                    ).filter(
-                        date_start__gte=today,
-                    ).order_by('date_start')
-
-                    events = []
-                    for event in events_on_day:
-                        events.append({
-                            'event': event,
-                            'category': CATEGORIES[event.location.category] if event.location else 'events',
-                            'tabindex': tabindex,
-                        })
-                        tabindex += 1
-
-                    if len(events_on_day) > 0:
-                        event_tree.append({
-                            'date': day,
-                            'events': events,
-                        })
-
-                    day = day + timedelta(days=1)
+        events = sorted(
+            self.between(max(month_start, today), month_end),
+            key=lambda event: (event.location.name, event.location_id) if event.location_id else ('', 0),
+        )
+
+        # Continue numbering where the by-date listing of the same events
+        # leaves off
+        tabindex = sum(1 for event in events if not event.all_day or event.location_id)
+
+        for event in events:
+            if not event.location_id:
+                continue
 
+            if not locations or locations[-1]['location'].id != event.location_id:
                 locations.append({
-                    'location': location,
-                    'category': CATEGORIES[location.category],
-                    'event_tree': event_tree,
+                    'location': event.location,
+                    'category': CATEGORIES[event.location.category],
+                    'event_tree': [],
                 })
 
+            event_tree = locations[-1]['event_tree']
+            date = event.date_start.astimezone(TZ).date()
+
+            if not event_tree or event_tree[-1]['date'].date() != date:
+                event_tree.append({
+                    'date': TZ.localize(datetime(date.year, date.month, date.day)),
+                    'events': [],
+                })
+
+            event_tree[-1]['events'].append({
+                'event': event,
+                'category': locations[-1]['category'],
+                'tabindex': tabindex,
+            })
+            tabindex += 1
+
         return {
             'date': first_of_month,
             'locations': locations,
         }
 
-    def prev(self, request):
+    def version(self, year, month):
+        today = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+        grid_start = self.grid_start(year, month)
+        grid_end = TZ.localize(grid_start.replace(tzinfo=None) + timedelta(days=42))
+
+        return self.state(
+            max(grid_start, today),
+            grid_end,
+            (year, month, today.date() if today > grid_start else None),
+        )
+
+    def state(self, date_from, date_to=None, key=None, **filters):
+        from .models import RepeatInfo
+
+        events = self.filter(date_start__gte=date_from, **filters)
+        if date_to:
+            events = events.filter(date_start__lt=date_to)
+
+        # The count and highest ID catch deletions and inserts that leave
+        # the latest update time where it was
+        events = events.aggregate(
+            updated=Max('date_updated'),
+            location_updated=Max('location__date_updated'),
+            count=Count('id'),
+            last_id=Max('id'),
+        )
+        series = RepeatInfo.objects.filter(virtual=True, **filters).aggregate(
+            updated=Max('date_updated'),
+            exception_updated=Max('recurrenceexception__date_updated'),
+            count=Count('id', distinct=True),
+        )
+
+        last_modified = max(
+            [
+                date for date in [
+                    events['updated'],
+                    events['location_updated'],
+                    series['updated'],
+                    series['exception_updated'],
+                ] if date
+            ],
+            default=None,
+        )
+
+        hasher = hashlib.md5()
+        hasher.update(repr((
+            key,
+            sorted(events.items()),
+            sorted(series.items()),
+        )).encode('utf8'))
+
+        return (hasher.hexdigest(), last_modified)
+
+    def prev(self, request, year=None, month=None):
         this_month = datetime.now(TZ).replace(
             day=1, hour=0, minute=0, second=0, microsecond=0)
 
         month = datetime(
-            int(request.GET.get('year', this_month.year)),
-            int(request.GET.get('month', this_month.month)),
+            year or int(request.GET.get('year', this_month.year)),
+            month or int(request.GET.get('month', this_month.month)),
             1, 0, 0, 0, 0,
         )
         month = TZ.localize(month)
@@ -671,14 +1452,14 @@ class EventManager(models.Manager):
                 }
             }
 
-    def next(self, request):
+    def next(self, request, year=None, month=None):
         this_month = datetime.now(TZ).replace(
             day=1, hour=0, minute=0, second=0, microsecond=0)
 
         try:
             month = datetime(
-                int(request.GET.get('year', this_month.year)),
-                int(request.GET.get('month', this_month.month)),
+                year or int(request.GET.get('year', this_month.year)),
+                month or int(request.GET.get('month', this_month.month)),
                 1, 0, 0, 0, 0,
             )
             month = TZ.localize(month)
@@ -695,295 +1476,388 @@ class EventManager(models.Manager):
         }
 
 class RecurringEventManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(info__isnull=False)
+
+    def preview(self, request, limit=10):
+        # Reads the create form's fields and expands them the way
+        # create_recurring_event will store or expand them, without writing
+        # anything
+        date_start_str = request.GET.get('date-start', '')
+        date_end_str = request.GET.get('date-end', '')
+        all_day = request.GET.get('all-day', '') == 'true'
+        weekday_list = [weekday for weekday in request.GET.getlist('weekday-list') if weekday in WEEKDAYS]
+        ends_on_str = request.GET.get('ends-on', '')
+        virtual = request.GET.get('virtual', '') == 'true'
+
+        errors = []
+
+        try:
+            frequency = int(request.GET.get('frequency', '1'))
+            frequency_units = int(request.GET.get('frequency-units', '0'))
+            ends = int(request.GET.get('ends', '0'))
+            ends_after = int(request.GET.get('ends-after', '0') or '0')
+        except ValueError:
+            return (False, ['Please enter whole numbers for the repeat options.'])
+
+        if frequency < 1:
+            errors.append('Please enter a number of repetitions.')
+
+        if not 1 <= frequency_units <= 4:
+            errors.append('Please choose a unit for frequency.')
+
+        if ends == 1 and not ends_on_str:
+            errors.append('Please enter a date to end on.')
+
+        if ends == 2 and ends_after < 1:
+            errors.append('Please enter a number of occurrences.')
+
+        def parse(date_str):
+            try:
+                return TZ.localize(datetime.strptime(date_str, '%m/%d/%Y %I:%M %p'))
+            except ValueError:
+                errors.append('Please enter dates as MM/DD/YYYY HH:MM AM.')
+
+        date_start = parse(date_start_str) if date_start_str else None
+        date_end = parse(date_end_str) if date_end_str and not all_day else None
+        ends_on = parse(ends_on_str) if ends == 1 and ends_on_str else None
+
+        if not date_start_str:
+            errors.append('Please enter a start date.')
+
+        if date_start and date_end and date_start >= date_end:
+            errors.append('Start date must come before end date.')
+
+        if errors:
+            return (False, errors)
+
+        if all_day:
+            date_start = date_start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        if ends_on:
+            ends_on = ends_on.replace(hour=23, minute=59, second=59, microsecond=999999)
+
+        # Virtual series follow their rule with no one-year cap, so one that
+        # never ends only shows its first occurrences
+        occurrences = generate_occurrences(
+            date_start,
+            frequency,
+            frequency_units,
+            ends,
+            date_end=date_end,
+            weekday_list=weekday_list,
+            ends_on=ends_on,
+            ends_after=ends_after,
+            capped=not virtual,
+        )
+        occurrences = list(islice(occurrences, limit) if virtual and ends == 0 else occurrences)
+
+        open_ended = virtual and ends == 0
+
+        return (True, {
+            'count': None if open_ended else len(occurrences),
+            'open_ended': open_ended,
+            'occurrences': [
+                {
+                    'date_start': start.isoformat(),
+                    'date_end': end.isoformat() if end else None,
+                    'display': date_format(start, 'D. n/j/y') if all_day else '%s%s' % (
+                        date_format(start, 'D. n/j/y g:i a'),
+                        '–' + date_format(end, 'g:i a') if end else '',
+                    ),
+                }
+                for start, end in occurrences[:limit]
+            ],
+            'more': None if open_ended else max(len(occurrences) - limit, 0),
+        })
+
     def create_recurring_event(self, name, date_start, frequency, frequency_units, ends, **kwargs):
         from .models import RecurringEvent, RepeatInfo
 
-        date = date_start
-        max_duration = relativedelta(years=+1)
-        date_max = date + max_duration
+        if ends == 1 and 'ends_on' not in kwargs:
+            raise TypeError("create_recurring_event() missing 1 required keyword argument 'ends_on'")
 
-        rd_values = [
-            relativedelta(days=+frequency),
-            relativedelta(days=+(7 * frequency)),
-            relativedelta(months=+frequency),
-            relativedelta(years=+frequency),
-        ]
+        if ends == 2 and 'ends_after' not in kwargs:
+            raise TypeError("create_recurring_event() missing 1 required keyword argument 'ends_after'")
 
-        days_of_week = [
-            'monday',
-            'tuesday',
-            'wednesday',
-            'thursday',
-            'friday',
-            'saturday',
-            'sunday',
-        ]
+        with transaction.atomic():
+            info = RepeatInfo.objects.create_repeat_info(frequency, frequency_units, ends, **kwargs)
 
-        info = RepeatInfo.objects.create_repeat_info(frequency, frequency_units, ends, **kwargs)
+            if ('weekday_list' in kwargs and kwargs['weekday_list']) or (frequency == 1 and frequency_units == 2):
+                info.weekly = True
+            else:
+                info.weekly = False
+
+            info.ical_uid = kwargs.get('ical_uid')
+            info.ical_checksum = kwargs.get('ical_checksum')
+
+            if kwargs.get('virtual'):
+                info.virtual = True
+                info.name = name
+                info.description = kwargs.get('description')
+                info.all_day = 'date_end' not in kwargs and kwargs.get('all_day', False)
+                info.date_start = date_start.astimezone(pytz.utc)
+                info.date_end = kwargs['date_end'].astimezone(pytz.utc) if 'date_end' in kwargs else None
+                info.location = kwargs.get('location')
+                info.album = kwargs.get('album')
+                info.save()
+
+                return RecurringEvent.objects.none()
+
+            info.save()
+
+            # Events with an end time are never all-day
+            all_day = 'date_end' not in kwargs and kwargs.get('all_day', False)
+
+            events = [
+                RecurringEvent(
+                    name=name,
+                    slug=slugify(name),
+                    description=kwargs.get('description'),
+                    all_day=all_day,
+                    date_start=start.astimezone(pytz.utc),
+                    date_end=end.astimezone(pytz.utc) if end else None,
+                    location=kwargs.get('location'),
+                    album=kwargs.get('album'),
+                )
+                for start, end in generate_occurrences(
+                    date_start,
+                    frequency,
+                    frequency_units,
+                    ends,
+                    date_end=kwargs.get('date_end'),
+                    weekday_list=kwargs.get('weekday_list'),
+                    ends_on=kwargs.get('ends_on'),
+                    ends_after=kwargs.get('ends_after', 0),
+                )
+            ]
 
-        if ('weekday_list' in kwargs and kwargs['weekday_list']) or (frequency == 1 and frequency_units == 2):
-            info.weekly = True
-        else:
-            info.weekly = False
+            self.bulk_create_occurrences(info, events)
 
-        info.save()
+        return RecurringEvent.objects.filter(info=info)
 
-        frequency_units -= 1
+    def extend(self, info, horizon):
+        from .models import RecurringEvent
 
-        if ends == 0: # ends after max. duration
-            if 'date_end' in kwargs:
-                date_end = kwargs['date_end']
+        last = RecurringEvent.objects.filter(info=info).order_by('-date_start').first()
+        if last is None:
+            return []
 
-                if 'weekday_list' in kwargs and kwargs['weekday_list']:
-                    while date <= date_max:
-                        if days_of_week[date.weekday()] in kwargs['weekday_list']:
-                            event = self.create(name=name, date_start=date.astimezone(pytz.utc), info=info)
+        today = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+        weekday_list = [WEEKDAYS[weekday.weekday] for weekday in info.weekday_set.all()]
+        date_start = last.date_start.astimezone(TZ)
+        date_end = last.date_end.astimezone(TZ) if last.date_end else None
+        events = []
+
+        # Each pass continues the rule from the latest occurrence, up to a
+        # year at a time, so a series that ran dry long ago keeps its rhythm
+        while date_start < horizon:
+            occurrences = [
+                (start, end) for start, end in generate_occurrences(
+                    date_start,
+                    info.frequency,
+                    info.frequency_units,
+                    1,
+                    date_end=date_end,
+                    weekday_list=weekday_list,
+                    ends_on=horizon,
+                )
+                if start > date_start
+            ]
+
+            if not occurrences:
+                break
+
+            events += [
+                RecurringEvent(
+                    name=last.name,
+                    slug=last.slug,
+                    description=last.description,
+                    all_day=last.all_day,
+                    date_start=start.astimezone(pytz.utc),
+                    date_end=end.astimezone(pytz.utc) if end else None,
+                    location=last.location,
+                    album=last.album,
+                )
+                for start, end in occurrences
+                if start >= today
+            ]
 
-                            event.date_end = date_end.astimezone(pytz.utc)
+            date_start, date_end = occurrences[-1]
 
-                            if 'location' in kwargs:
-                                event.location = kwargs['location']
+        return self.bulk_create_occurrences(info, events) if events else []
 
-                            event.save()
+    def bulk_create_occurrences(self, info, events):
+        from .cache import invalidate_between
 
-                        date = TZ.localize(
-                            date.replace(tzinfo=None) + timedelta(days=1)
-                        )
-                        date_end = TZ.localize(
-                            date_end.replace(tzinfo=None) + timedelta(days=1)
-                        )
-                else:
-                    while date <= date_max:
-                        event = self.create(name=name, date_start=date.astimezone(pytz.utc), info=info)
+        for event in events:
+            event.info = info
+            event.set_local_dates()
 
-                        event.date_end = date_end.astimezone(pytz.utc)
+        self.bulk_create(events)
 
-                        if 'location' in kwargs:
-                            event.location = kwargs['location']
+        # Bulk inserts send no post_save signals
+        if events:
+            invalidate_between(
+                min(event.date_start for event in events),
+                max(event.date_end or event.date_start for event in events),
+            )
 
-                        event.save()
+        return events
 
-                        date = TZ.localize(
-                            date.replace(tzinfo=None) +
-                            rd_values[frequency_units]
-                        )
-                        date_end = TZ.localize(
-                            date_end.replace(tzinfo=None) +
-                            rd_values[frequency_units]
-                        )
-            else:
-                if 'weekday_list' in kwargs and kwargs['weekday_list']:
-                    while date <= date_max:
-                        if days_of_week[date.weekday()] in kwargs['weekday_list']:
-                            event = self.create(name=name, date_start=date.astimezone(pytz.utc), info=info)
+    def virtual_series(self, date_from, date_to=None, condition=None, **filters):
+        from .models import RepeatInfo
 
-                            if 'all_day' in kwargs:
-                                event.all_day = kwargs['all_day']
-                            else:
-                                event.all_day = False
+        infos = RepeatInfo.objects.filter(virtual=True, **filters).exclude(
+            ends=1,
+            ends_on__lt=date_from,
+        ).select_related('location', 'album')
 
-                            if 'location' in kwargs:
-                                event.location = kwargs['location']
+        if date_to:
+            infos = infos.filter(date_start__lt=date_to)
 
-                            event.save()
+        if condition:
+            infos = infos.filter(condition)
 
-                        date = TZ.localize(
-                            date.replace(tzinfo=None) + timedelta(days=1)
-                        )
-                else:
-                    while date <= date_max:
-                        event = self.create(name=name, date_start=date.astimezone(pytz.utc), info=info)
-
-                        if 'all_day' in kwargs:
-                            event.all_day = kwargs['all_day']
-                        else:
-                            event.all_day = False
-
-                        if 'location' in kwargs:
-                            event.location = kwargs['location']
-                        event.save()
-
-                        date = TZ.localize(
-                            date.replace(tzinfo=None) +
-                            rd_values[frequency_units]
-                        )
-        elif ends == 1: # ends on date
-            if 'ends_on' not in kwargs:
-                raise TypeError("create_recurring_event() missing 1 required keyword argument 'ends_on'")
-
-            if 'date_end' in kwargs:
-                date_end = kwargs['date_end']
-
-                if 'weekday_list' in kwargs and kwargs['weekday_list']:
-                    while date <= kwargs['ends_on'] and date <= date_max:
-                        if days_of_week[date.weekday()] in kwargs['weekday_list']:
-                            event = self.create(name=name, date_start=date.astimezone(pytz.utc), info=info)
-
-                            event.date_end = date_end.astimezone(pytz.utc)
-
-                            if 'location' in kwargs:
-                                event.location = kwargs['location']
-
-                            event.save()
-
-                        date = TZ.localize(
-                            date.replace(tzinfo=None) + timedelta(days=1)
-                        )
-                        date_end = TZ.localize(
-                            date_end.replace(tzinfo=None) + timedelta(days=1)
-                        )
-                else:
-                    while date <= kwargs['ends_on'] and date <= date_max:
-                        event = self.create(name=name, date_start=date.astimezone(pytz.utc), info=info)
+        return infos
 
-                        event.date_end = date_end.astimezone(pytz.utc)
+    def expand(self, date_from, date_to=None, limit=None, condition=None, **filters):
+        from .models import RecurrenceException
 
-                        if 'location' in kwargs:
-                            event.location = kwargs['location']
+        infos = list(self.virtual_series(date_from, date_to, condition, **filters).prefetch_related('weekday_set'))
+        if not infos:
+            return []
 
-                        event.save()
+        exceptions = RecurrenceException.objects.filter(
+            info__in=infos,
+            date_start__gte=date_from,
+        )
 
-                        date = TZ.localize(
-                            date.replace(tzinfo=None) +
-                            rd_values[frequency_units]
-                        )
-                        date_end = TZ.localize(
-                            date_end.replace(tzinfo=None) +
-                            rd_values[frequency_units]
-                        )
-            else:
-                if 'weekday_list' in kwargs and kwargs['weekday_list']:
-                    while date <= kwargs['ends_on'] and date <= date_max:
-                        if days_of_week[date.weekday()] in kwargs['weekday_list']:
-                            event = self.create(name=name, date_start=date.astimezone(pytz.utc), info=info)
+        if date_to:
+            exceptions = exceptions.filter(date_start__lt=date_to)
 
-                            if 'all_day' in kwargs:
-                                event.all_day = kwargs['all_day']
-                            else:
-                                event.all_day = False
+        exceptions = set(exceptions.values_list('info_id', 'date_start'))
 
-                            if 'location' in kwargs:
-                                event.location = kwargs['location']
+        # Rules are expanded on local wall-clock time
+        local_from = date_from.astimezone(TZ).replace(tzinfo=None)
+        local_to = date_to.astimezone(TZ).replace(tzinfo=None) if date_to else None
 
-                            event.save()
+        events = []
+        for info in infos:
+            count = 0
+            for date in info.rrule().xafter(local_from, inc=True):
+                if local_to and date >= local_to:
+                    break
 
-                        date = TZ.localize(
-                            date.replace(tzinfo=None) + timedelta(days=1)
-                        )
-                else:
-                    while date <= kwargs['ends_on'] and date <= date_max:
-                        event = self.create(name=name, date_start=date.astimezone(pytz.utc), info=info)
+                date_start = TZ.localize(date)
+                if (info.id, date_start) in exceptions:
+                    continue
 
-                        if 'all_day' in kwargs:
-                            event.all_day = kwargs['all_day']
-                        else:
-                            event.all_day = False
+                events.append(info.occurrence(date_start))
 
-                        if 'location' in kwargs:
-                            event.location = kwargs['location']
+                count += 1
+                if limit and count >= limit:
+                    break
 
-                        event.save()
+        return sorted(events, key=attrgetter('date_start'))
 
-                        date = TZ.localize(
-                            date.replace(tzinfo=None) +
-                            rd_values[frequency_units]
-                        )
-        elif ends == 2: # ends after a number of occurrences
-            if 'ends_after' not in kwargs:
-                raise TypeError("create_recurring_event() missing 1 required keyword argument 'ends_after'")
+    def occurrence(self, category_slug, location_slug, event_slug, info_id, occurrence):
+        from .models import RepeatInfo, RecurrenceException, OCCURRENCE_FORMAT
+        from locations.models import CATEGORIES, Location
+        from images.models import Image
 
-            if 'date_end' in kwargs:
-                date_end = kwargs['date_end']
+        try:
+            info = RepeatInfo.objects.select_related('location', 'album').get(id=info_id, virtual=True)
+            date_start = TZ.localize(datetime.strptime(occurrence, OCCURRENCE_FORMAT))
+        except (RepeatInfo.DoesNotExist, ValueError):
+            return (False, {'status': 'invalid ID'})
 
-                if 'weekday_list' in kwargs and kwargs['weekday_list']:
-                    i = 0
-                    while i < kwargs['ends_after'] and date <= date_max:
-                        if days_of_week[date.weekday()] in kwargs['weekday_list']:
-                            event = self.create(name=name, date_start=date.astimezone(pytz.utc), info=info)
+        exceptions = set(RecurrenceException.objects.filter(
+            info=info,
+            date_start__gte=date_start,
+        ).values_list('date_start', flat=True))
 
-                            event.date_end = date_end.astimezone(pytz.utc)
+        rule = info.rrule()
+        if rule.after(date_start.replace(tzinfo=None), inc=True) != date_start.replace(tzinfo=None):
+            return (False, {'status': 'invalid ID'})
 
-                            if 'location' in kwargs:
-                                event.location = kwargs['location']
+        # Edited occurrences live on as rows of their own
+        if date_start in exceptions:
+            event = self.filter(info=info, date_start=date_start).first()
 
-                            event.save()
+            if not event:
+                return (False, {'status': 'invalid ID'})
 
-                            i += 1
+            return (False, {
+                'status': 'moved',
+                'url': event.get_absolute_url(),
+            })
 
-                        date = TZ.localize(
-                            date.replace(tzinfo=None) + timedelta(days=1)
-                        )
-                        date_end = TZ.localize(
-                            date_end.replace(tzinfo=None) + timedelta(days=1)
-                        )
-                else:
-                    i = 0
-                    while i < kwargs['ends_after'] and date <= date_max:
-                        event = self.create(name=name, date_start=date.astimezone(pytz.utc), info=info)
-
-                        event.date_end = date_end.astimezone(pytz.utc)
-
-                        if 'location' in kwargs:
-                            event.location = kwargs['location']
-
-                        event.save()
-
-                        i += 1
-                        date = TZ.localize(
-                            date.replace(tzinfo=None) +
-                            rd_values[frequency_units]
-                        )
-                        date_end = TZ.localize(
-                            date_end.replace(tzinfo=None) +
-                            rd_values[frequency_units]
-                        )
-            else:
-                if 'weekday_list' in kwargs and kwargs['weekday_list']:
-                    i = 0
-                    while i < kwargs['ends_after'] and date <= date_max:
-                        if days_of_week[date.weekday()] in kwargs['weekday_list']:
-                            event = self.create(name=name, date_start=date.astimezone(pytz.utc), info=info)
+        event = info.occurrence(date_start)
 
-                            if 'all_day' in kwargs:
-                                event.all_day = kwargs['all_day']
-                            else:
-                                event.all_day = False
+        _category_slug, _location_slug, _event_slug = event.url_args()
 
-                            if 'location' in kwargs:
-                                event.location = kwargs['location']
+        if _category_slug != category_slug or \
+            _location_slug != location_slug or \
+            _event_slug != event_slug:
+            return (False, {
+                'status': 'invalid slug',
+                'args': [_category_slug, _location_slug, _event_slug, info.id, occurrence],
+            })
 
-                            event.save()
+        next_event = None
+        for date in rule.xafter(date_start.replace(tzinfo=None)):
+            if TZ.localize(date) not in exceptions:
+                next_event = info.occurrence(TZ.localize(date))
+                break
 
-                            i += 1
+        images_preview, images_count = Image.objects.preview(event.album) if event.album else (None, 0)
 
-                        date = TZ.localize(
-                            date.replace(tzinfo=None) + timedelta(days=1)
-                        )
-                else:
-                    i = 0
-                    while i < kwargs['ends_after'] and date <= date_max:
-                        event = self.create(name=name, date_start=date.astimezone(pytz.utc), info=info)
+        return (True, {
+            'event': event,
+            'next_event': next_event,
+            'category_name': Location.CATEGORY_CHOICES[event.location.category][1] if event.location else 'Miscellaneous',
+            'category_slug': _category_slug,
+            'recurring': True,
+            'images_preview': images_preview,
+            'images_count': images_count,
+        })
 
-                        if 'all_day' in kwargs:
-                            event.all_day = kwargs['all_day']
-                        else:
-                            event.all_day = False
+    def update_occurrence(self, request):
+        from .models import RepeatInfo, RecurrenceException, OCCURRENCE_FORMAT
 
-                        if 'location' in kwargs:
-                            event.location = kwargs['location']
+        info_id = int(request.POST.get('info-id', '0'))
+        occurrence = request.POST.get('occurrence', '')
+        action = request.POST.get('action', '')
 
-                        event.save()
+        try:
+            info = RepeatInfo.objects.select_related('location', 'album').get(id=info_id, virtual=True)
+            date_start = TZ.localize(datetime.strptime(occurrence, OCCURRENCE_FORMAT))
+        except (RepeatInfo.DoesNotExist, ValueError):
+            return (False, {'errors': ['The specified event could not be found.']})
 
-                        i += 1
-                        date = TZ.localize(
-                            date.replace(tzinfo=None) +
-                            rd_values[frequency_units]
-                        )
+        if action != 'edit' and action != 'cancel':
+            return (False, {'errors': ['Please choose what to do with this instance.']})
 
-        return RecurringEvent.objects.filter(info=info)
+        # An exception keeps the rule from producing this occurrence again;
+        # edited occurrences are then stored as ordinary rows
+        with transaction.atomic():
+            RecurrenceException.objects.get_or_create(info=info, date_start=date_start)
+
+            if action == 'cancel':
+                return (True, {'success': 'You have successfully cancelled 1 event.'})
+
+            event = info.occurrence(date_start)
+            event.save()
+
+        return (True, {
+            'success': 'This instance can now be edited on its own.',
+            'event': event,
+        })
 
     def update_recurring_event(self, request, info):
-        from .models import Event, RecurringEvent
+        from .cache import invalidate_all, invalidate_between
+        from .models import Event, RecurringEvent, RepeatInfo, RecurrenceException
         from locations.models import Location, CATEGORIES
         from images.models import Album
 
@@ -999,15 +1873,6 @@ class RecurringEventManager(models.Manager):
         album_id = request.POST.get('album-id', '0')
         album_name = request.POST.get('album-name', '0')
 
-        # Relative delta values
-        frequency_units = info.frequency_units - 1
-        rd_values = [
-            relativedelta(days=+info.frequency),
-            relativedelta(days=+(7 * info.frequency)),
-            relativedelta(months=+info.frequency),
-            relativedelta(years=+info.frequency),
-        ]
-
         # Data restructuring
         event_id = int(event_id)
         all_day = all_day_value == 'true'
@@ -1090,43 +1955,115 @@ class RecurringEventManager(models.Manager):
                 })
 
         # Update events
+        try:
+            event = self.get(id=event_id, info=info)
+        except RecurringEvent.DoesNotExist:
+            return (False, {
+                'errors': ['The specified event could not be found.'],
+                'event_found': False,
+            })
+
+        # Start and end times move by the wall-clock difference between the
+        # edited instance and its new times, so every following instance
+        # keeps its own date
+        delta = date_start.replace(tzinfo=None) - event.date_start.astimezone(TZ).replace(tzinfo=None)
+
+        fields = {
+            'all_day': all_day,
+            'location': location,
+            'album': album,
+            'date_start': F('date_start') + delta,
+            'date_updated': datetime.now(pytz.utc),
+        }
+
+        if name:
+            fields['name'] = name
+            fields['slug'] = slugify(name)
+
+        if description:
+            fields['description'] = description
+
+        if date_end_str:
+            fields['date_end'] = F('date_start') + (delta + (date_end - date_start))
+        else:
+            fields['date_end'] = F('date_end') + delta
+
         events = RecurringEvent.objects.filter(
             info=info,
-            date_start__gte=date_start,
+            date_start__gte=event.date_start,
         )
-        events_len = len(events)
-        for event in events:
-            if name:
-                event.name = name
-
-            if description:
-                event.description = description
-            event.all_day = all_day
+        date_last = events.aggregate(date_last=Max(Coalesce('date_end', 'date_start')))['date_last']
+
+        # The edited instances are checked where they are moving to
+        if not all_day or date_end_str:
+            occurrences = list(events.values_list('date_start', 'date_end'))
+            if info.virtual:
+                occurrences += [
+                    (occurrence.date_start, occurrence.date_end)
+                    for occurrence in RecurringEvent.objects.expand(
+                        event.date_start,
+                        event.date_start + relativedelta(years=+1),
+                        id=info.id,
+                    )
+                ]
+
+            intervals = []
+            for start, end in occurrences:
+                start = TZ.localize(start.astimezone(TZ).replace(tzinfo=None) + delta)
+                if date_end_str:
+                    end = start + (date_end - date_start)
+                elif end:
+                    end = TZ.localize(end.astimezone(TZ).replace(tzinfo=None) + delta)
 
-            event.date_start = date_start
-            date_start = TZ.localize(
-                date_start.replace(tzinfo=None) +
-                rd_values[frequency_units]
-            )
+                intervals.append((start, end))
 
-            if date_end_str:
-                event.date_end = date_end
-                date_end = TZ.localize(
-                    date_end.replace(tzinfo=None) +
-                    rd_values[frequency_units]
-                )
+            conflicts = Event.objects.conflicts(location, intervals, info=info)
+            if conflicts:
+                return (False, {
+                    'errors': [describe_conflicts(location, conflicts)],
+                    'event_found': True,
+                    'args': [
+                        CATEGORIES[event.location.category] if event.location else 'events',
+                        event.location.slug if event.location else 'undefined',
+                        event.slug,
+                        event.id,
+                    ],
+                })
 
-            event.location = location
-            event.album = album
+        ids = list(events.values_list('id', flat=True))
+
+        with transaction.atomic():
+            events_len = events.update(**fields)
+            Event.objects.update_local_dates(id__in=ids)
+
+            # Virtual series carry the same edits on their template, and
+            # their exceptions follow the instances they stand for
+            if info.virtual:
+                fields.pop('slug', None)
+                RepeatInfo.objects.filter(id=info.id).update(**fields)
+                RecurrenceException.objects.filter(
+                    info=info,
+                    date_start__gte=event.date_start,
+                ).update(date_start=F('date_start') + delta, date_updated=fields['date_updated'])
+
+        # Set-based updates send no post_save signals, so the months the
+        # instances moved out of and into are invalidated here
+        if info.virtual:
+            invalidate_all()
+        elif date_last:
+            invalidate_between(
+                min(event.date_start, event.date_start + delta),
+                max(date_last, date_last + delta),
+            )
 
-            event.save()
+        event.refresh_from_db()
 
         return (True, {
             'success': 'You have successfully updated %d event%s.' % (events_len, '' if events_len == 1 else 's'),
             'event_found': True,
             'args': [
-                CATEGORIES[event.location.category] if location else 'events',
-                event.location.slug if location else 'undefined',
+                CATEGORIES[event.location.category] if event.location else 'events',
+                event.location.slug if event.location else 'undefined',
                 event.slug,
                 event.id,
             ],
@@ -0,0 +1,69 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0013_auto_20201026_1404'),
+        ('locations', '0011_auto_20201026_1404'),
+        ('events', '0029_auto_20201026_1404'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repeatinfo',
+            name='album',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='images.album'),
+        ),
+        migrations.AddField(
+            model_name='repeatinfo',
+            name='all_day',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='repeatinfo',
+            name='date_end',
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='repeatinfo',
+            name='date_start',
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='repeatinfo',
+            name='description',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='repeatinfo',
+            name='location',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='locations.location'),
+        ),
+        migrations.AddField(
+            model_name='repeatinfo',
+            name='name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='repeatinfo',
+            name='virtual',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='RecurrenceException',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+                ('date_start', models.DateTimeField()),
+                ('info', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='events.repeatinfo')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0030_auto_20261018_0335'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['date_start'], name='event_date_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['location', 'date_start'], name='event_location_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(location__isnull=False), fields=['date_start'], name='event_located_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recurrenceexception',
+            index=models.Index(fields=['info', 'date_start'], name='exception_info_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repeatinfo',
+            index=models.Index(condition=models.Q(virtual=True), fields=['date_start'], name='repeatinfo_virtual_idx'),
+        ),
+    ]
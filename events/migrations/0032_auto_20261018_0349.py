@@ -0,0 +1,33 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0031_auto_20261018_0337'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='ical_checksum',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='ical_uid',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='repeatinfo',
+            name='ical_checksum',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name='repeatinfo',
+            name='ical_uid',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:53
+
+from django.db import migrations, models
+
+
+# Text search uses icontains, which PostgreSQL runs as UPPER(...) LIKE; only
+# trigram indexes on the same expression can serve it
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute('CREATE INDEX IF NOT EXISTS event_name_trgm_idx ON events_event USING gin (UPPER(name::text) gin_trgm_ops)')
+    schema_editor.execute('CREATE INDEX IF NOT EXISTS location_name_trgm_idx ON locations_location USING gin (UPPER(name::text) gin_trgm_ops)')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP INDEX IF EXISTS event_name_trgm_idx')
+    schema_editor.execute('DROP INDEX IF EXISTS location_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0032_auto_20261018_0349'),
+        ('locations', '0012_auto_20261018_0353'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(all_day=True), fields=['date_start'], name='event_all_day_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(holiday=True), fields=['date_start'], name='event_holiday_start_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
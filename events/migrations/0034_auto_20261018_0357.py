@@ -0,0 +1,21 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0033_auto_20261018_0353'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='event',
+            name='event_location_start_idx',
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['location', 'date_start', 'date_end'], name='event_location_start_end_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:59
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+from mtm.settings import TZ
+
+
+# Historical models have no set_local_dates(), so the rule is repeated here
+def backfill_local_dates(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+
+    events = []
+    for event in Event.objects.only('id', 'date_start', 'date_end').iterator(chunk_size=500):
+        event.local_date = event.date_start.astimezone(TZ).date()
+        event.local_end_date = max(event.local_date, (event.date_end - timedelta(microseconds=1)).astimezone(TZ).date()) if event.date_end else event.local_date
+        events.append(event)
+
+        if len(events) == 500:
+            Event.objects.bulk_update(events, ['local_date', 'local_end_date'])
+            events = []
+
+    Event.objects.bulk_update(events, ['local_date', 'local_end_date'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0034_auto_20261018_0357'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='local_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='local_end_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_local_dates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['local_date', 'local_end_date'], name='event_local_date_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.1.14 on 2026-10-18 09:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0035_auto_20261018_0359'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('info_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('date_deleted', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['date_updated', 'id'], name='event_date_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['date_deleted'], name='tombstone_date_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.1.14 on 2026-10-18 09:02
+
+from django.db import migrations
+
+
+# Holidays are computed by events.holidays now. The rows are not kept
+# anywhere, so this migration cannot be reversed
+def delete_holidays(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    Tombstone = apps.get_model('events', 'Tombstone')
+
+    # Signals do not run here, so the change feed is told directly
+    holidays = Event.objects.filter(holiday=True)
+    Tombstone.objects.bulk_create([Tombstone(event_id=id) for id in holidays.values_list('id', flat=True)])
+    holidays.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0036_auto_20261018_0401'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_holidays),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='event_holiday_start_idx',
+        ),
+        migrations.RemoveField(
+            model_name='event',
+            name='holiday',
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 3.1.14 on 2026-10-18 10:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Occurrences keep their ids, so their URLs and change feed cursors still work
+def copy_infos(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    RecurringEvent = apps.get_model('events', 'RecurringEvent')
+
+    Event.objects.filter(
+        id__in=RecurringEvent.objects.values('event_ptr_id'),
+    ).update(repeat_info=models.Subquery(
+        RecurringEvent.objects.filter(event_ptr_id=models.OuterRef('id')).values('info_id')[:1],
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0037_auto_20261018_0402'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='repeat_info',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='events.repeatinfo'),
+        ),
+        migrations.RunPython(copy_infos, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='RecurringEvent',
+        ),
+        migrations.RenameField(
+            model_name='event',
+            old_name='repeat_info',
+            new_name='info',
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='info',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, to='events.repeatinfo'),
+        ),
+        migrations.CreateModel(
+            name='RecurringEvent',
+            fields=[],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('events.event',),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['info', 'date_start'], name='event_info_start_idx'),
+        ),
+    ]
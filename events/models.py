@@ -1,39 +1,83 @@
+from datetime import timedelta
 from slugify import slugify
 
 from django.db import models
 from django.shortcuts import render
+from django.urls import reverse
 
 from home.models import TimestampedModel, NewsItem
 from locations.models import Location
 from images.models import Album
-from .managers import EventManager, RecurringEventManager, RepeatInfoManager, WeekdayManager
+from .managers import EventManager, RecurringEventManager, RepeatInfoManager, WeekdayManager, series_rule
 from mtm.settings import TZ
 
+OCCURRENCE_FORMAT = '%Y%m%d%H%M'
+
 class Event(TimestampedModel, NewsItem):
     name = models.CharField(max_length=255)
     slug = models.SlugField(default='', max_length=80, null=True, blank=True)
     description = models.TextField(null=True, blank=True)
-    holiday = models.BooleanField(default=False)
     all_day = models.BooleanField(default=False)
     date_start = models.DateTimeField()
     date_end = models.DateTimeField(null=True, blank=True)
+    local_date = models.DateField(null=True, blank=True)
+    local_end_date = models.DateField(null=True, blank=True)
     location = models.ForeignKey(Location, null=True, blank=True, on_delete=models.SET_NULL)
     album = models.ForeignKey(Album, null=True, blank=True, on_delete=models.SET_NULL)
+    info = models.ForeignKey('RepeatInfo', null=True, blank=True, default=None, on_delete=models.CASCADE)
+    ical_uid = models.CharField(max_length=255, null=True, blank=True, db_index=True)
+    ical_checksum = models.CharField(max_length=32, null=True, blank=True)
     objects = EventManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_start'], name='event_date_start_idx'),
+            models.Index(fields=['local_date', 'local_end_date'], name='event_local_date_idx'),
+            models.Index(fields=['date_updated', 'id'], name='event_date_updated_idx'),
+            models.Index(fields=['location', 'date_start', 'date_end'], name='event_location_start_end_idx'),
+            models.Index(fields=['info', 'date_start'], name='event_info_start_idx'),
+            # Backends without partial indexes skip this one
+            models.Index(fields=['date_start'], name='event_located_start_idx', condition=models.Q(location__isnull=False)),
+            models.Index(fields=['date_start'], name='event_all_day_start_idx', condition=models.Q(all_day=True)),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+
+        # Occurrences of a series share the table and load as RecurringEvent
+        if cls is Event and instance.__dict__.get('info_id') is not None:
+            instance.__class__ = RecurringEvent
+
+        return instance
+
     def save(self, *args, **kwargs):
         self.slug = slugify(self.name)
 
-        if self.holiday:
-            self.all_day = True
+        self.set_local_dates()
 
         super().save(*args, **kwargs)
 
+    def set_local_dates(self):
+        # An event that ends at midnight does not run into the next day
+        self.local_date = self.date_start.astimezone(TZ).date()
+        self.local_end_date = max(self.local_date, (self.date_end - timedelta(microseconds=1)).astimezone(TZ).date()) if self.date_end else self.local_date
+
     def render(self, request):
         return render(request, 'events/event_home.html', {
             'event': self,
         })
 
+    def url_args(self):
+        return [
+            self.location.category_slug() if self.location else 'events',
+            self.location.slug if self.location else 'undefined',
+            self.slug,
+        ]
+
+    def get_absolute_url(self):
+        return reverse('events:event', args=self.url_args() + [self.id])
+
     def __str__(self):
         if self.location:
             if self.date_end:
@@ -51,9 +95,26 @@ class Event(TimestampedModel, NewsItem):
                 return self.name + ' - ' + self.date_start.astimezone(TZ).strftime('%a. %b. %-d, %Y (%-I:%M %p)')
 
 class RecurringEvent(Event):
-    info = models.ForeignKey('RepeatInfo', on_delete=models.CASCADE, default=None)
     objects = RecurringEventManager()
 
+    class Meta:
+        proxy = True
+
+    @property
+    def virtual(self):
+        return self.id is None and self.info_id is not None
+
+    def get_absolute_url(self):
+        # Occurrences expanded from a virtual series have no row of their
+        # own and are addressed by their series and local start time
+        if self.virtual:
+            return reverse('events:occurrence', args=self.url_args() + [
+                self.info_id,
+                self.date_start.astimezone(TZ).strftime(OCCURRENCE_FORMAT),
+            ])
+
+        return super().get_absolute_url()
+
     def __str__(self):
         if self.location:
             if self.date_end:
@@ -90,8 +151,82 @@ class RepeatInfo(TimestampedModel):
     ends = models.PositiveSmallIntegerField(default=0, choices=ENDS_CHOICES)
     ends_on = models.DateTimeField(null=True, blank=True, default=None)
     ends_after = models.PositiveSmallIntegerField(default=0)
+
+    # Virtual series keep no occurrence rows; occurrences are expanded from
+    # the rule and the template fields below whenever they are read
+    virtual = models.BooleanField(default=False)
+    name = models.CharField(max_length=255, default='', blank=True)
+    description = models.TextField(null=True, blank=True)
+    all_day = models.BooleanField(default=False)
+    date_start = models.DateTimeField(null=True, blank=True, default=None)
+    date_end = models.DateTimeField(null=True, blank=True, default=None)
+    location = models.ForeignKey(Location, null=True, blank=True, on_delete=models.SET_NULL)
+    album = models.ForeignKey(Album, null=True, blank=True, on_delete=models.SET_NULL)
+    ical_uid = models.CharField(max_length=255, null=True, blank=True, db_index=True)
+    ical_checksum = models.CharField(max_length=32, null=True, blank=True)
     objects = RepeatInfoManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_start'], name='repeatinfo_virtual_idx', condition=models.Q(virtual=True)),
+        ]
+
+    def rrule(self, dtstart=None, until=None):
+        if not until and self.ends == 1:
+            until = self.ends_on.astimezone(TZ).replace(tzinfo=None)
+
+        return series_rule(
+            dtstart or self.date_start.astimezone(TZ).replace(tzinfo=None),
+            self.frequency,
+            self.frequency_units,
+            weekdays=[weekday.weekday for weekday in self.weekday_set.all()],
+            until=until,
+            count=self.ends_after if self.ends == 2 else None,
+        )
+
+    def occurrence(self, date_start):
+        date_end = None
+        if self.date_end:
+            date_end = TZ.localize(
+                date_start.astimezone(TZ).replace(tzinfo=None) +
+                (self.date_end.astimezone(TZ).replace(tzinfo=None) - self.date_start.astimezone(TZ).replace(tzinfo=None))
+            )
+
+        return RecurringEvent(
+            name=self.name,
+            slug=slugify(self.name),
+            description=self.description,
+            all_day=self.all_day,
+            date_start=date_start,
+            date_end=date_end,
+            location=self.location,
+            album=self.album,
+            info=self,
+            date_created=self.date_created,
+            date_updated=self.date_updated,
+        )
+
+class RecurrenceException(TimestampedModel):
+    info = models.ForeignKey(RepeatInfo, on_delete=models.CASCADE)
+    date_start = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['info', 'date_start'], name='exception_info_start_idx'),
+        ]
+
+# Deleted events and virtual series are remembered for a while so that
+# clients syncing from the change feed can drop them
+class Tombstone(models.Model):
+    event_id = models.PositiveIntegerField(null=True, blank=True)
+    info_id = models.PositiveIntegerField(null=True, blank=True)
+    date_deleted = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_deleted'], name='tombstone_date_deleted_idx'),
+        ]
+
 class Weekday(TimestampedModel):
     WEEKDAY_CHOICES = [
         (0, 'Monday'),
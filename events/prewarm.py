@@ -0,0 +1,81 @@
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+from django.db import connections
+
+from mtm.settings import TZ, EVENTS_PREWARM_WORKERS, EVENTS_PREWARM_QUEUE
+
+# Visitors nearly always move one month on from the page they land on, so
+# the months on either side are built into the cache in the background.
+# Each process warms a month once at a time and keeps a bounded number of
+# months waiting; a short-lived cache key keeps processes sharing a cache
+# from warming the same month together.
+LOCK_TIMEOUT = 60
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(max_workers=max(EVENTS_PREWARM_WORKERS, 1), thread_name_prefix='events-prewarm')
+pending = set()
+lock = threading.Lock()
+
+def lock_key(year, month):
+    return 'events:prewarm:%d:%d' % (year, month)
+
+def warm(year, month):
+    from .models import Event
+
+    try:
+        if not cache.add(lock_key(year, month), True, LOCK_TIMEOUT):
+            return
+
+        try:
+            # Snapshots that are already built are only read back
+            Event.objects.calendar(None, year, month)
+            Event.objects.by_date(None, year, month)
+            Event.objects.by_location(None, year, month)
+        finally:
+            cache.delete(lock_key(year, month))
+    except Exception:
+        # A month that fails to warm is built by its first visitor instead
+        logger.exception('Could not prewarm events for %d-%02d', year, month)
+    finally:
+        with lock:
+            pending.discard((year, month))
+
+        # Worker threads outlive requests, so nothing else closes these
+        connections.close_all()
+
+def schedule(year, month):
+    if EVENTS_PREWARM_WORKERS <= 0:
+        return
+
+    with lock:
+        if (year, month) in pending or len(pending) >= EVENTS_PREWARM_QUEUE:
+            return
+
+        pending.add((year, month))
+
+    executor.submit(warm, year, month)
+
+def adjacent(request, year=None, month=None):
+    this_month = datetime.now(TZ).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    try:
+        month = TZ.localize(datetime(
+            year or int(request.GET.get('year', this_month.year)),
+            month or int(request.GET.get('month', this_month.month)),
+            1,
+        ))
+    except (TypeError, ValueError):
+        return
+
+    # Months before this one cannot be navigated to
+    for offset in [+1, -1]:
+        date = month + relativedelta(months=offset)
+        if date >= this_month:
+            schedule(date.year, date.month)
@@ -0,0 +1,88 @@
+import threading
+
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from locations.models import Location
+from .cache import invalidate_all, invalidate_dates
+from .models import Event, RecurringEvent, RepeatInfo, RecurrenceException, Tombstone
+from mtm.settings import TZ
+
+# Bulk purges invalidate the cache and write tombstones once for the whole
+# batch, so the per-row receivers stand aside while one runs
+purging = threading.local()
+
+@contextmanager
+def bulk_delete():
+    purging.active = True
+    try:
+        yield
+    finally:
+        purging.active = False
+
+# An event that moves leaves stale listings behind in the months it moved
+# out of, so its stored dates are read before they are overwritten
+@receiver(pre_save, sender=Event)
+@receiver(pre_save, sender=RecurringEvent)
+def event_saving(sender, instance, raw=False, **kwargs):
+    if raw or instance.id is None:
+        return
+
+    instance._previous_dates = Event.objects.filter(id=instance.id).values_list('date_start', 'date_end').first()
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=RecurringEvent)
+@receiver(post_delete, sender=RecurringEvent)
+def event_changed(sender, instance, **kwargs):
+    if getattr(purging, 'active', False):
+        return
+
+    previous_dates = instance.__dict__.pop('_previous_dates', None) or ()
+    invalidate_dates(instance.date_start, instance.date_end, *previous_dates)
+
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=RecurringEvent)
+def event_deleted(sender, instance, **kwargs):
+    if getattr(purging, 'active', False):
+        return
+
+    Tombstone.objects.create(event_id=instance.id)
+
+@receiver(post_save, sender=RecurrenceException)
+@receiver(post_delete, sender=RecurrenceException)
+def exception_changed(sender, instance, **kwargs):
+    invalidate_dates(instance.date_start)
+
+@receiver(post_save, sender=RepeatInfo)
+@receiver(post_delete, sender=RepeatInfo)
+def repeat_info_changed(sender, instance, **kwargs):
+    # Virtual series can reach into any month
+    if instance.virtual:
+        invalidate_all()
+
+@receiver(post_delete, sender=RepeatInfo)
+def repeat_info_deleted(sender, instance, **kwargs):
+    if instance.virtual:
+        Tombstone.objects.create(info_id=instance.id)
+
+@receiver(post_save, sender=Location)
+def location_changed(sender, instance, created, **kwargs):
+    if created:
+        return
+
+    invalidate_dates(*(
+        TZ.localize(datetime(month.year, month.month, 1))
+        for month in Event.objects.filter(location=instance).dates('local_date', 'month')
+    ))
+
+    if RepeatInfo.objects.filter(location=instance, virtual=True).exists():
+        invalidate_all()
+
+@receiver(post_delete, sender=Location)
+def location_deleted(sender, instance, **kwargs):
+    # Its events have already been detached by the time this runs
+    invalidate_all()
@@ -228,4 +228,45 @@ $(() => {
       $(this).remove();
     });
   });
+
+  // Preview the occurrences a repeat would create before submitting
+  let $createEventForm = $('#createEventForm');
+  let $recurrencePreview = $('#recurrencePreview');
+  let previewTimeout = null;
+
+  function previewRecurrence() {
+    clearTimeout(previewTimeout);
+    previewTimeout = setTimeout(() => {
+      if (Number($createEventForm.find('[name="frequency-units"]').val()) === 0) {
+        $recurrencePreview.empty();
+        return;
+      }
+
+      $.getJSON('/events/preview-recurrence/', $createEventForm.serialize())
+        .done((response) => {
+          let $list = $('<ul class="bulleted"></ul>');
+          response.occurrences.forEach((occurrence) => {
+            $list.append($('<li></li>').text(occurrence.display));
+          });
+
+          if (response.open_ended) {
+            $list.append($('<li class="more"></li>').text('and so on'));
+          } else if (response.more) {
+            $list.append($('<li class="more"></li>').text(`+${response.more} more`));
+          }
+
+          let summary = response.open_ended
+            ? 'Repeats with no end'
+            : `${response.count} occurrence${response.count === 1 ? '' : 's'}`;
+
+          $recurrencePreview.empty()
+            .append($('<p></p>').text(summary))
+            .append($list);
+        })
+        .fail(() => $recurrencePreview.empty());
+    }, 250);
+  }
+
+  $createEventForm.on('change input', previewRecurrence);
+  $('#dateStart, #dateEnd, #endsOn').on('change.datetimepicker', previewRecurrence);
 });
@@ -6,3 +6,4 @@ a=$("#locationAutocomplete li.active");1===$("#locationAutocomplete li").length&
 n.on("click","ul li",function(){f.val($(this).data("id"));g.val($(this).text());$("#locationAutocomplete ul").fadeOut(500,function(){$(this).remove()})});g.focusout(function(){$("#locationAutocomplete ul").fadeOut(500,function(){$(this).remove()})});var m=$("#albumId"),k=$("#albumName"),c=-1,l=0,p=$("#albumAutocompleteEvent");k.on("input",function(a){$("#albumAutocompleteEvent ul").remove();m.val(0);a=$(this).val();""!==a&&$.get("/images/autocomplete",{q:a},function(a){p.append(a);c=-1;l=$("#albumAutocompleteEvent li").length})});
 k.keydown(function(a){switch(a.keyCode){case 13:a.preventDefault();a=$("#albumAutocompleteEvent li.active");1===$("#albumAutocompleteEvent li").length&&(a=$("#albumAutocompleteEvent li:first-child"));m.val(a.data("id"));k.val(a.text());$("#albumAutocompleteEvent ul").remove();break;case 38:c=-1===c?l-1:(c-1+l)%l;$("#albumAutocompleteEvent li").removeClass("active");$("#albumAutocompleteEvent li:nth-child("+(c+1)+")").addClass("active");break;case 40:c=-1===c?0:(c+1)%l,$("#albumAutocompleteEvent li").removeClass("active"),
 $("#albumAutocompleteEvent li:nth-child("+(c+1)+")").addClass("active")}});p.on("click","ul li",function(){m.val($(this).data("id"));k.val($(this).text());$("#albumAutocompleteEvent ul").fadeOut(500,function(){$(this).remove()})});k.focusout(function(){$("#albumAutocompleteEvent ul").fadeOut(500,function(){$(this).remove()})})});
+$(function(){var a=$("#createEventForm"),b=$("#recurrencePreview"),c=null;function d(){clearTimeout(c);c=setTimeout(function(){0===Number(a.find('[name="frequency-units"]').val())?b.empty():$.getJSON("/events/preview-recurrence/",a.serialize()).done(function(e){var f=$('<ul class="bulleted"></ul>');e.occurrences.forEach(function(g){f.append($("<li></li>").text(g.display))});e.open_ended?f.append($('<li class="more"></li>').text("and so on")):e.more&&f.append($('<li class="more"></li>').text("+"+e.more+" more"));b.empty().append($("<p></p>").text(e.open_ended?"Repeats with no end":e.count+" occurrence"+(1===e.count?"":"s"))).append(f)}).fail(function(){return b.empty()})},250)}a.on("change input",d);$("#dateStart, #dateEnd, #endsOn").on("change.datetimepicker",d)});
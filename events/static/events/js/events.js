@@ -88,8 +88,7 @@ $(() => {
     $activeTab.addClass('active');
   });
 
-  // show month and year in header and populate calendar with slots
-  // for that month
+  // show month and year in header
   function updateMonth(context) {
     $('#month input[name="year"]').val(context['year']);
     $('#month input[name="month"]').val(context['month']);
@@ -113,96 +112,83 @@ $(() => {
     $('#calendarControls h2').text(
       `${fullMonth[date.getMonth()]} ${date.getFullYear()}`,
     );
-
-    $.get('/events/month/', context, function (response) {
-      $calendar.empty();
-      $calendar.append(response);
-    });
   }
 
-  function updateByDate(context) {
-    $.get('/events/by-date/', context, function (response) {
-      $byDate.empty();
-      $byDate.append(response);
+  function showByDate(context) {
+    $tabsChildren.removeClass('active').each(function () {
+      $($(this).data('href') + 'View').hide();
     });
-  }
 
-  function updateAndShowByDate(context) {
-    $.get('/events/by-date/', context, function (response) {
-      $byDate.empty();
-      $byDate.append(response);
+    $activeTab = $tabsByDate;
 
-      $tabsChildren.removeClass('active').each(function () {
-        $($(this).data('href') + 'View').hide();
-      });
+    $byDate.show();
+    $tabsByDate.addClass('active');
 
-      $activeTab = $tabsByDate;
+    document.location.href = '#' + context['day'];
+  }
 
-      $byDate.show();
-      $tabsByDate.addClass('active');
+  // update prev/next buttons
+  function updatePrev(response) {
+    let $prev = $('#prev');
+    let date = response['date'];
 
-      document.location.href = '#' + context['day'];
-    });
-  }
+    if (response['disabled']) {
+      $prev.addClass('disabled');
+    } else {
+      $prev.data('year', date['year']);
+      $prev.data('month', date['month']);
 
-  function updateByLocation(context) {
-    $.get('/events/by-location/', context, function (response) {
-      $byLocation.empty();
-      $byLocation.append(response);
-    });
-  }
+      $prev.attr('data-year', date['year']);
+      $prev.attr('data-month', date['month']);
 
-  // update prev/next buttons
-  function updatePrev(context) {
-    $.get('/events/prev/', context, function (response) {
-      let $prev = $('#prev');
-      let date = response['date'];
-
-      if (response['disabled']) {
-        $prev.addClass('disabled');
-      } else {
-        $prev.data('year', date['year']);
-        $prev.data('month', date['month']);
-
-        $prev.attr('data-year', date['year']);
-        $prev.attr('data-month', date['month']);
-
-        $prev.removeClass('disabled');
-      }
-    });
+      $prev.removeClass('disabled');
+    }
   }
 
-  function updateNext(context) {
-    $.get('/events/next/', context, function (response) {
-      let $next = $('#next');
-      let date = response['date'];
+  function updateNext(response) {
+    let $next = $('#next');
+    let date = response['date'];
 
-      $next.data('year', date['year']);
-      $next.data('month', date['month']);
+    $next.data('year', date['year']);
+    $next.data('month', date['month']);
 
-      $next.attr('data-year', date['year']);
-      $next.attr('data-month', date['month']);
+    $next.attr('data-year', date['year']);
+    $next.attr('data-month', date['month']);
 
-      $next.removeClass('disabled');
-    });
+    $next.removeClass('disabled');
   }
 
-  function updateDate(context) {
+  // fetch every view of a month in one request; the browser revalidates
+  // months it has already loaded and reuses them when unchanged
+  function updateDate(context, callback) {
     updateMonth(context);
-    updateByDate(context);
-    updateByLocation(context);
 
-    updatePrev(context);
-    updateNext(context);
+    $.getJSON(
+      `/events/${context['year']}/${context['month']}.json`,
+      function (response) {
+        $calendar.empty();
+        $calendar.append(response['calendar']);
+
+        $byDate.empty();
+        $byDate.append(response['by_date']);
+
+        $byLocation.empty();
+        $byLocation.append(response['by_location']);
+
+        updatePrev(response['prev']);
+        updateNext(response['next']);
+
+        if (callback) {
+          callback();
+        }
+      },
+    );
   }
 
   function updateAndShowDate(context) {
-    updateMonth(context);
-    updateAndShowByDate(context);
-    updateByLocation(context);
-
-    updatePrev(context);
-    updateNext(context);
+    updateDate(context, function () {
+      showByDate(context);
+    });
   }
 
   // navigate to previous/next day
@@ -230,16 +216,7 @@ $(() => {
     if (currentYear !== context['year'] || currentMonth !== context['month']) {
       updateAndShowDate(context);
     } else {
-      $tabsChildren.removeClass('active').each(function () {
-        $($(this).data('href') + 'View').hide();
-      });
-
-      $activeTab = $tabsByDate;
-
-      $byDate.show();
-      $tabsByDate.addClass('active');
-
-      document.location.href = '#' + context['day'];
+      showByDate(context);
     }
   }
 
@@ -1,3 +1,580 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import F
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from images.models import Album
+from locations.models import Location, Neighborhood
+from mtm.settings import TZ
+from . import holidays, ical
+from .intervals import IntervalTree
+from .managers import decode_cursor, generate_occurrences
+from .models import Event, RecurringEvent, RecurrenceException, RepeatInfo, Tombstone, OCCURRENCE_FORMAT
+
+class EventDetailQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        neighborhood = Neighborhood.objects.create(name='Loop')
+        cls.location = Location.objects.create(name='Bar', category=0, address1='1 State St', address2='', neighborhood=neighborhood)
+        user = User.objects.create_user('staff', 'staff@example.com', 'password')
+        cls.album = Album.objects.create(title='Photos', created_by=user)
+        cls.date_start = TZ.localize(datetime(2030, 1, 7, 19, 0))
+
+    def test_single_event(self):
+        event = Event.objects.create_single_event(
+            name='Open Mic',
+            date_start=self.date_start,
+            location=self.location,
+            album=self.album,
+        )
+
+        # event, images
+        with self.assertNumQueries(2):
+            valid, response = Event.objects.event('nightlife', 'bar', 'open-mic', event.id)
+
+        self.assertTrue(valid)
+        self.assertFalse(response['recurring'])
+        self.assertIsNone(response['next_event'])
+        self.assertEqual(response['event'].location, self.location)
+
+    def test_recurring_event(self):
+        events = RecurringEvent.objects.create_recurring_event(
+            name='Trivia',
+            date_start=self.date_start,
+            frequency=1,
+            frequency_units=2,
+            ends=2,
+            ends_after=3,
+            location=self.location,
+            album=self.album,
+        )
+        event = events.order_by('date_start').first()
+
+        # event, next occurrence, images
+        with self.assertNumQueries(3):
+            valid, response = Event.objects.event('nightlife', 'bar', 'trivia', event.id)
+
+        self.assertTrue(valid)
+        self.assertTrue(response['recurring'])
+        self.assertIsInstance(response['event'], RecurringEvent)
+        self.assertEqual(response['next_event'].date_start, self.date_start + timedelta(days=7))
+        self.assertEqual(response['images_count'], 0)
+
+class MonthListingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.bar = Location.objects.create(name='Bar', category=0, address1='1 State St', address2='')
+        cls.arcade = Location.objects.create(name='Arcade', category=0, address1='2 State St', address2='')
+        cls.today = TZ.localize(datetime(2029, 12, 1))
+
+        def create(name, day, hour, **kwargs):
+            return Event.objects.create_single_event(name, TZ.localize(datetime(2030, 1, day, hour, kwargs.pop('minute', 0))), **kwargs)
+
+        cls.art_walk = create('Art Walk', 7, 0, all_day=True)
+        cls.brunch = create('Brunch', 7, 10)
+        cls.open_mic = create('Open Mic', 7, 19, location=cls.bar)
+        cls.late_show = create('Late Show', 7, 23, minute=30, location=cls.arcade)
+        cls.trivia = create('Trivia', 9, 19, location=cls.bar)
+
+    def test_calendar_buckets_the_grid_by_local_date(self):
+        # events, virtual series
+        with self.assertNumQueries(2):
+            response = Event.objects.build_calendar(2030, 1, self.today)
+
+        calendar = response['calendar']
+
+        # The grid starts on the Sunday before the 1st
+        self.assertEqual(len(calendar), 42)
+        self.assertEqual(calendar[0]['date'].date(), datetime(2029, 12, 30).date())
+        self.assertEqual([event.name for event in calendar[2]['events']], ['New Year\'s Day'])
+
+        # The late show starts on the 8th in UTC
+        day = calendar[8]
+        self.assertEqual((day['row'], day['col']), (1, 1))
+        self.assertEqual(day['events'], [self.art_walk, self.brunch, self.open_mic])
+        self.assertEqual(day['more'], 1)
+
+        self.assertEqual(calendar[10]['events'], [self.trivia])
+        self.assertTrue(response['has_events'])
+
+    def test_by_date_groups_days_and_numbers_links(self):
+        # events, virtual series
+        with self.assertNumQueries(2):
+            calendar = Event.objects.build_by_date(2030, 1, self.today)['calendar']
+
+        self.assertEqual([day['date'].day for day in calendar], [1, 7, 9, 21])
+
+        # Unlinked all-day events are skipped when numbering
+        self.assertEqual([
+            (event['event'].name, event.get('tabindex'), event.get('category'))
+            for event in calendar[1]['events']
+        ], [
+            ('Art Walk', None, None),
+            ('Brunch', 0, None),
+            ('Open Mic', 1, 'nightlife'),
+            ('Late Show', 2, 'nightlife'),
+        ])
+        self.assertEqual(calendar[2]['events'][0]['tabindex'], 3)
+        self.assertNotIn('tabindex', calendar[3]['events'][0])
+
+    def test_by_location_groups_venues_and_continues_numbering(self):
+        # events, virtual series
+        with self.assertNumQueries(2):
+            locations = Event.objects.build_by_location(2030, 1, self.today)['locations']
+
+        self.assertEqual([location['location'] for location in locations], [self.arcade, self.bar])
+        self.assertEqual([day['date'].day for day in locations[1]['event_tree']], [7, 9])
+
+        # The by-date listing of the same month numbers four links
+        self.assertEqual([
+            (event['event'], event['tabindex'])
+            for location in locations
+            for day in location['event_tree']
+            for event in day['events']
+        ], [
+            (self.late_show, 4),
+            (self.open_mic, 5),
+            (self.trivia, 6),
+        ])
+
+class HolidayTests(SimpleTestCase):
+    def test_rules_compute_each_year(self):
+        days = {name: day for day, name in holidays.dates(2030)}
+
+        self.assertEqual(days['Martin Luther King Jr. Day'], date(2030, 1, 21))
+        self.assertEqual(days['Easter'], date(2030, 4, 21))
+        self.assertEqual(days['Memorial Day'], date(2030, 5, 27))
+        self.assertEqual(days['Labor Day'], date(2030, 9, 2))
+        self.assertEqual(days['Thanksgiving'], date(2030, 11, 28))
+        self.assertEqual(len(days), len(holidays.RULES))
+
+    def test_between_spans_years_and_excludes_its_end(self):
+        found = holidays.between(TZ.localize(datetime(2029, 12, 24)), TZ.localize(datetime(2030, 1, 1)))
+
+        self.assertEqual([holiday.name for holiday in found], ['Christmas Eve', 'Christmas Day', 'New Year\'s Eve'])
+        self.assertEqual(found[0].date_start, TZ.localize(datetime(2029, 12, 24)))
+
+class RecurrenceRuleTests(TestCase):
+    def setUp(self):
+        # A Monday
+        self.date_start = TZ.localize(datetime(2030, 3, 4, 19, 0))
+        self.expected = [
+            TZ.localize(datetime(2030, 3, day, 19, 0)) for day in [4, 6, 18, 20]
+        ] + [
+            TZ.localize(datetime(2030, 4, day, 19, 0)) for day in [1, 3]
+        ]
+
+    def test_generate_occurrences_keeps_the_interval_with_weekdays(self):
+        occurrences = list(generate_occurrences(
+            self.date_start,
+            2,
+            2,
+            2,
+            date_end=self.date_start + timedelta(hours=2),
+            weekday_list=['monday', 'wednesday'],
+            ends_after=6,
+        ))
+
+        self.assertEqual([start for start, end in occurrences], self.expected)
+        self.assertEqual(occurrences[1][1], TZ.localize(datetime(2030, 3, 6, 21, 0)))
+
+    def test_stored_and_virtual_series_agree(self):
+        stored = RecurringEvent.objects.create_recurring_event(
+            'Stored', self.date_start, 2, 2, 2,
+            ends_after=6,
+            weekday_list=['monday', 'wednesday'],
+        )
+        RecurringEvent.objects.create_recurring_event(
+            'Virtual', self.date_start, 2, 2, 2,
+            ends_after=6,
+            weekday_list=['monday', 'wednesday'],
+            virtual=True,
+        )
+
+        virtual = RecurringEvent.objects.expand(self.date_start, self.date_start + timedelta(days=365))
+
+        self.assertEqual([event.date_start for event in stored.order_by('date_start')], self.expected)
+        self.assertEqual([event.date_start for event in virtual], self.expected)
+
+class LocalDateTests(TestCase):
+    def setUp(self):
+        self.events = RecurringEvent.objects.create_recurring_event(
+            'Trivia', TZ.localize(datetime(2030, 1, 7, 19, 0)), 1, 2, 2,
+            date_end=TZ.localize(datetime(2030, 1, 7, 21, 0)),
+            ends_after=4,
+        )
+
+    def test_unchanged_rows_are_not_written(self):
+        # select only
+        with self.assertNumQueries(1):
+            Event.objects.update_local_dates(info__isnull=False)
+
+    def test_moved_rows_get_their_new_dates(self):
+        self.events.filter(date_start__gte=TZ.localize(datetime(2030, 1, 20))).update(
+            date_start=F('date_start') + timedelta(hours=6),
+            date_end=F('date_end') + timedelta(hours=6),
+        )
+
+        Event.objects.update_local_dates(info__isnull=False)
+
+        self.assertEqual(
+            list(self.events.order_by('date_start').values_list('local_date', 'local_end_date')),
+            [(date(2030, 1, 7), date(2030, 1, 7)), (date(2030, 1, 14), date(2030, 1, 14))] +
+            [(date(2030, 1, day), date(2030, 1, day)) for day in [22, 29]],
+        )
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Location.objects.create(name='Bar', category=0, address1='1 State St', address2='')
+        cls.date_from = TZ.localize(datetime(2030, 1, 1))
+
+        for day in [7, 14, 21]:
+            Event.objects.create_single_event('Open Mic', TZ.localize(datetime(2030, 1, day, 19, 0)), location=cls.location)
+
+        # Occurrences at the same instant as the stored events
+        RecurringEvent.objects.create_recurring_event(
+            'Trivia', TZ.localize(datetime(2030, 1, 7, 19, 0)), 1, 2, 2,
+            ends_after=3,
+            location=cls.location,
+            virtual=True,
+        )
+        RecurringEvent.objects.create_recurring_event(
+            'Karaoke', TZ.localize(datetime(2030, 1, 9, 21, 0)), 1, 2, 2,
+            ends_after=2,
+            location=cls.location,
+            virtual=True,
+        )
+
+    def pages(self, size):
+        pages = []
+        cursor = None
+
+        while True:
+            events, next_cursor = Event.objects.keyset(self.date_from, None, cursor, size, location=self.location)
+            pages.append([(event.date_start.astimezone(TZ).day, event.name) for event in events])
+
+            if next_cursor is None:
+                return pages
+
+            cursor = decode_cursor(next_cursor)
+
+    def test_pages_interleave_stored_and_virtual_events(self):
+        expected = [
+            (7, 'Trivia'), (7, 'Open Mic'), (9, 'Karaoke'),
+            (14, 'Trivia'), (14, 'Open Mic'), (16, 'Karaoke'),
+            (21, 'Trivia'), (21, 'Open Mic'),
+        ]
+
+        for size in [1, 2, 3, 8]:
+            pages = self.pages(size)
+
+            self.assertTrue(all(len(page) <= size for page in pages))
+            self.assertEqual([event for page in pages for event in page], expected)
+
+    def test_last_page_has_no_cursor(self):
+        self.assertEqual(len(self.pages(8)), 1)
+        self.assertEqual(len(self.pages(7)), 2)
+
+class IntervalTreeTests(SimpleTestCase):
+    def test_overlapping_matches_a_linear_scan(self):
+        intervals = [(start, start + length, i) for i, (start, length) in enumerate(
+            ((i * 37) % 100, (i * 13) % 20 + 1) for i in range(200)
+        )]
+        tree = IntervalTree(intervals)
+
+        for start in range(0, 120, 7):
+            for end in [start + 1, start + 5, start + 30]:
+                expected = sorted(interval for interval in intervals if interval[0] < end and interval[1] > start)
+                self.assertEqual(sorted(tree.overlapping(start, end)), expected)
+
+    def test_touching_intervals_do_not_overlap(self):
+        tree = IntervalTree([(0, 10, 'a'), (20, 30, 'b')])
+
+        self.assertEqual(tree.overlapping(10, 20), [])
+        self.assertEqual(tree.overlapping(9, 21), [(0, 10, 'a'), (20, 30, 'b')])
+
+    def test_empty_tree(self):
+        self.assertEqual(IntervalTree([]).overlapping(0, 10), [])
+
+class ConflictTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.bar = Location.objects.create(name='Bar', category=0, address1='1 State St', address2='')
+        cls.arcade = Location.objects.create(name='Arcade', category=0, address1='2 State St', address2='')
+
+        def create(name, hour, end_hour=None, **kwargs):
+            if end_hour:
+                kwargs['date_end'] = TZ.localize(datetime(2030, 1, 7, end_hour, 0))
+
+            return Event.objects.create_single_event(name, TZ.localize(datetime(2030, 1, 7, hour, 0)), **kwargs)
+
+        cls.open_mic = create('Open Mic', 19, 21, location=cls.bar)
+        cls.last_call = create('Last Call', 23, location=cls.bar)
+        create('Art Walk', 0, all_day=True, location=cls.bar)
+        create('Arcade Night', 19, 21, location=cls.arcade)
+
+        RecurringEvent.objects.create_recurring_event(
+            'Karaoke', TZ.localize(datetime(2030, 1, 7, 21, 0)), 1, 2, 2,
+            date_end=TZ.localize(datetime(2030, 1, 7, 22, 0)),
+            ends_after=2,
+            location=cls.bar,
+            virtual=True,
+        )
+
+    def conflicts(self, start_hour, end_hour, **kwargs):
+        return [event.name for event in Event.objects.conflicts(self.bar, [(
+            TZ.localize(datetime(2030, 1, 7, start_hour, 0)),
+            TZ.localize(datetime(2030, 1, 7, end_hour, 0)),
+        )], **kwargs)]
+
+    def test_overlaps_at_the_venue_are_found(self):
+        self.assertEqual(self.conflicts(20, 22), ['Open Mic', 'Karaoke'])
+        self.assertEqual(self.conflicts(21, 22), ['Karaoke'])
+        self.assertEqual(self.conflicts(18, 19), [])
+
+    def test_all_day_events_do_not_book_the_venue(self):
+        self.assertEqual(self.conflicts(0, 1), [])
+
+    def test_events_without_an_end_book_their_start(self):
+        self.assertEqual(self.conflicts(22, 23), [])
+        self.assertEqual([event.name for event in Event.objects.conflicts(self.bar, [(
+            TZ.localize(datetime(2030, 1, 7, 22, 30)),
+            TZ.localize(datetime(2030, 1, 8, 0, 0)),
+        )])], ['Last Call'])
+
+    def test_the_edited_event_is_not_its_own_conflict(self):
+        self.assertEqual(self.conflicts(19, 20, event=self.open_mic), [])
+
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        self.instant = datetime.now(TZ).replace(microsecond=0) - timedelta(hours=1)
+        self.events = [
+            Event.objects.create_single_event('Show %d' % i, TZ.localize(datetime(2030, 1, 7, 19, 0)))
+            for i in range(5)
+        ]
+
+        # Everything is stamped in the same instant
+        Event.objects.update(date_updated=self.instant)
+        Tombstone.objects.bulk_create([Tombstone(event_id=1000 + i) for i in range(3)])
+        Tombstone.objects.update(date_deleted=self.instant)
+
+    def poll(self, since):
+        with patch('mtm.settings.EVENT_CHANGES_PER_PAGE', 2):
+            return self.client.get(reverse('events:changes'), {'since': since}).json()
+
+    def test_rows_sharing_a_timestamp_are_sent_once(self):
+        events = []
+        deleted = []
+        since = (self.instant - timedelta(minutes=1)).isoformat()
+
+        while True:
+            response = self.poll(since)
+            events += [event['id'] for event in response['events']]
+            deleted += response['deleted']
+            since = response['next']
+
+            if not response['more']:
+                break
+
+        self.assertEqual(events, [event.id for event in self.events])
+        self.assertEqual(deleted, [1000, 1001, 1002])
+
+        response = self.poll(since)
+        self.assertEqual((response['events'], response['deleted'], response['next']), ([], [], since))
+
+    def test_later_changes_follow_the_cursor(self):
+        response = self.poll((self.instant - timedelta(minutes=1)).isoformat())
+        while response['more']:
+            response = self.poll(response['next'])
+
+        # A deletion recorded in the same instant as the cursor
+        Tombstone.objects.create(event_id=2000)
+        Tombstone.objects.filter(event_id=2000).update(date_deleted=self.instant)
+        self.events[0].save()
+
+        response = self.poll(response['next'])
+        self.assertEqual([event['id'] for event in response['events']], [self.events[0].id])
+        self.assertEqual(response['deleted'], [2000])
+
+    def test_invalid_and_expired_since(self):
+        self.assertEqual(self.client.get(reverse('events:changes'), {'since': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('events:changes'), {'since': '2000-01-01'}).status_code, 410)
+
+class FlattenRecurringEventMigrationTests(TransactionTestCase):
+    migrate_from = ('events', '0037_auto_20261018_0402')
+    migrate_to = ('events', '0038_auto_20261018_0500')
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([target])
+
+        return executor.loader.project_state([target]).apps
+
+    def tearDown(self):
+        self.migrate(self.migrate_to)
+
+    def test_occurrences_keep_their_ids_and_series(self):
+        apps = self.migrate(self.migrate_from)
+        Event = apps.get_model('events', 'Event')
+        RecurringEvent = apps.get_model('events', 'RecurringEvent')
+        RepeatInfo = apps.get_model('events', 'RepeatInfo')
+
+        date_start = TZ.localize(datetime(2030, 1, 7, 19, 0))
+        info = RepeatInfo.objects.create(frequency=1, frequency_units=2, ends=0)
+        single = Event.objects.create(name='Open Mic', slug='open-mic', date_start=date_start)
+        occurrences = [
+            RecurringEvent.objects.create(name='Trivia', slug='trivia', date_start=date_start + timedelta(days=7 * i), info=info)
+            for i in range(3)
+        ]
+
+        apps = self.migrate(self.migrate_to)
+        Event = apps.get_model('events', 'Event')
+
+        self.assertEqual(
+            dict(Event.objects.values_list('id', 'info_id')),
+            {single.id: None, **{occurrence.id: info.id for occurrence in occurrences}},
+        )
+        self.assertEqual(Event.objects.get(id=occurrences[1].id).date_start, date_start + timedelta(days=7))
+
+class UpdateOccurrencePermissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.date_start = TZ.localize(datetime(2030, 1, 7, 19, 0))
+        RecurringEvent.objects.create_recurring_event('Brunch', cls.date_start, 1, 2, 0, virtual=True)
+        cls.info = RepeatInfo.objects.get()
+
+        User.objects.create_user('staff', 'staff@example.com', 'password')
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def cancel(self):
+        return self.client.post(reverse('events:update-occurrence'), {
+            'info-id': self.info.id,
+            'occurrence': self.date_start.strftime(OCCURRENCE_FORMAT),
+            'action': 'cancel',
+        })
+
+    def test_anonymous_user_is_forbidden(self):
+        self.assertEqual(self.cancel().status_code, 403)
+        self.assertFalse(RecurrenceException.objects.exists())
+
+    def test_staff_user_is_forbidden(self):
+        self.client.login(username='staff', password='password')
+
+        self.assertEqual(self.cancel().status_code, 403)
+        self.assertFalse(RecurrenceException.objects.exists())
+
+    def test_superuser_can_cancel(self):
+        self.client.login(username='admin', password='password')
+
+        self.assertEqual(self.cancel().status_code, 302)
+        self.assertTrue(RecurrenceException.objects.filter(info=self.info, date_start=self.date_start).exists())
+
+class RecurrencePreviewTests(TestCase):
+    def preview(self, **fields):
+        return self.client.get(reverse('events:preview-recurrence'), {
+            'date-start': '01/07/2030 07:00 PM',
+            'frequency': '1',
+            'frequency-units': '2',
+            **fields,
+        }).json()
+
+    def test_stored_series_is_capped_at_a_year(self):
+        response = self.preview(ends='0')
+
+        self.assertEqual(response['count'], 53)
+        self.assertEqual(response['more'], 43)
+        self.assertFalse(response['open_ended'])
+
+    def test_virtual_series_follows_its_rule(self):
+        response = self.preview(ends='2', **{'ends-after': '80', 'virtual': 'true'})
+
+        self.assertEqual(response['count'], 80)
+        self.assertEqual(len(response['occurrences']), 10)
+
+    def test_open_ended_virtual_series_is_not_counted(self):
+        response = self.preview(ends='0', virtual='true')
+
+        self.assertTrue(response['open_ended'])
+        self.assertIsNone(response['count'])
+        self.assertEqual(len(response['occurrences']), 10)
+        self.assertEqual(response['occurrences'][-1]['date_start'], TZ.localize(datetime(2030, 3, 11, 19, 0)).isoformat())
+
+class CalendarImportTests(TestCase):
+    def calendar(self, *events):
+        lines = ['BEGIN:VCALENDAR', 'VERSION:2.0']
+        for properties in events:
+            lines += ['BEGIN:VEVENT'] + list(properties) + ['END:VEVENT']
+        lines.append('END:VCALENDAR')
+
+        return [line + '\r\n' for line in lines]
+
+    def test_events_and_series_are_imported(self):
+        counts = ical.import_calendar(self.calendar(
+            ['UID:show', 'SUMMARY:Show', 'DTSTART;TZID=America/Chicago:20300107T190000', 'DURATION:PT2H'],
+            ['UID:trivia', 'SUMMARY:Trivia', 'DTSTART;TZID=America/Chicago:20300107T190000', 'RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;COUNT=4', 'EXDATE;TZID=America/Chicago:20300109T190000'],
+        ))
+
+        self.assertEqual(counts, {'created': 2, 'updated': 0, 'skipped': 0})
+        self.assertEqual(Event.objects.get(ical_uid='show').date_end, TZ.localize(datetime(2030, 1, 7, 21, 0)))
+        self.assertEqual(
+            [event.date_start for event in RecurringEvent.objects.order_by('date_start')],
+            [TZ.localize(datetime(2030, 1, day, 19, 0)) for day in [7, 21, 23]],
+        )
+
+    def test_unchanged_events_are_skipped(self):
+        calendar = self.calendar(['UID:show', 'SUMMARY:Show', 'DTSTART:20300107T190000'])
+
+        ical.import_calendar(calendar)
+
+        self.assertEqual(ical.import_calendar(calendar), {'created': 0, 'updated': 0, 'skipped': 1})
+
+    def test_malformed_components_are_skipped(self):
+        counts = ical.import_calendar(self.calendar(
+            ['UID:no-start', 'SUMMARY:No start'],
+            ['UID:bad-start', 'SUMMARY:Bad start', 'DTSTART:2030-01-07'],
+            ['UID:bad-interval', 'SUMMARY:Bad interval', 'DTSTART:20300107T190000', 'RRULE:FREQ=WEEKLY;INTERVAL=X'],
+            ['UID:bad-until', 'SUMMARY:Bad until', 'DTSTART:20300107T190000', 'RRULE:FREQ=WEEKLY;UNTIL=soon'],
+            ['UID:bad-exdate', 'SUMMARY:Bad exdate', 'DTSTART:20300107T190000', 'RRULE:FREQ=WEEKLY;COUNT=2', 'EXDATE:never'],
+            ['UID:bad-override', 'SUMMARY:Bad override', 'DTSTART:20300107T190000', 'RECURRENCE-ID:never'],
+            ['UID:show', 'SUMMARY:Show', 'DTSTART:20300107T190000'],
+        ))
+
+        self.assertEqual(counts, {'created': 1, 'updated': 0, 'skipped': 6})
+        self.assertEqual(list(Event.objects.values_list('ical_uid', flat=True)), ['show'])
+
+    def test_failed_file_is_rolled_back(self):
+        calendar = self.calendar(
+            ['UID:trivia', 'SUMMARY:Trivia', 'DTSTART:20300107T190000', 'RRULE:FREQ=WEEKLY;COUNT=2'],
+            ['UID:show', 'DTSTART:20300107T190000'],
+        )
+        calendar.insert(-2, b'SUMMARY:\xff\r\n')
+
+        with self.assertRaises(UnicodeDecodeError):
+            ical.import_calendar(calendar)
+
+        self.assertFalse(Event.objects.exists())
+
+    def test_past_series_starts_from_its_next_occurrence(self):
+        today = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+        date_start = (today - timedelta(days=70)).replace(hour=19)
+
+        counts = ical.import_calendar(self.calendar([
+            'UID:trivia',
+            'SUMMARY:Trivia',
+            'DTSTART;TZID=America/Chicago:' + date_start.strftime('%Y%m%dT%H%M%S'),
+            'RRULE:FREQ=DAILY;INTERVAL=7;COUNT=20',
+        ]))
+
+        dates = [event.date_start.astimezone(TZ) for event in RecurringEvent.objects.order_by('date_start')]
+
+        self.assertEqual(counts['created'], 1)
+        self.assertEqual(len(dates), 10)
+        self.assertEqual(dates[0].date(), today.date())
+        self.assertEqual(dates[0].hour, 19)
@@ -6,11 +6,21 @@ urlpatterns = [
     path('events/', views.index, name='index'),
     path('events/create/', views.create_event, name='create'),
     path('events/update/', views.update_event, name='update'),
+    path('events/import/', views.import_events, name='import'),
+    path('events/preview-recurrence/', views.preview_recurrence, name='preview-recurrence'),
     path('events/delete/', views.delete_event, name='delete'),
     path('events/month/', views.month, name='month'),
     path('events/by-date/', views.by_date, name='by-date'),
     path('events/by-location/', views.by_location, name='by-location'),
     path('events/prev/', views.prev, name='prev'),
     path('events/next/', views.next, name='next'),
+    path('events/changes/', views.changes, name='changes'),
+    path('events/now/', views.now, name='now'),
+    path('events/tonight/', views.tonight, name='tonight'),
+    path('events/calendar.ics', views.feed, name='feed'),
+    re_path(r'^events/(?P<year>\d{4})/$', views.year, name='year'),
+    re_path(r'^events/(?P<year>\d{4})/(?P<month>[1-9]|1[0-2])\.json$', views.month_json, name='month-json'),
+    path('events/occurrence/update/', views.update_occurrence, name='update-occurrence'),
     re_path(r'^(?P<category_slug>(nightlife|restaurants|nightlife-restaurants|arts-and-entertainment|health-and-fitness|sports|non-profit|editorials-and-opinions|events))/(?P<location_slug>[\da-z]+(-[\da-z]+)*)/(?P<event_slug>[\da-z]+(-[\da-z]+)*)/(?P<event_id>[1-9]\d*)/$', views.event, name='event'),
+    re_path(r'^(?P<category_slug>(nightlife|restaurants|nightlife-restaurants|arts-and-entertainment|health-and-fitness|sports|non-profit|editorials-and-opinions|events))/(?P<location_slug>[\da-z]+(-[\da-z]+)*)/(?P<event_slug>[\da-z]+(-[\da-z]+)*)/(?P<info_id>[1-9]\d*)/(?P<occurrence>\d{12})/$', views.occurrence, name='occurrence'),
 ]
@@ -4,23 +4,37 @@ from dateutil.relativedelta import relativedelta
 from django.contrib import messages
 from django.http import (
     HttpResponseBadRequest,
+    HttpResponseForbidden,
     HttpResponseNotFound,
     HttpResponseRedirect,
     JsonResponse,
 )
 from django.shortcuts import render, redirect
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 
 from mtm.settings import TZ, NAME, GOOGLE_MAPS_API_KEY
-from .models import Event
+from . import ical, prewarm
+from .models import Event, RecurringEvent
+
+SEARCH_PARAMETERS = ['q', 'from', 'to', 'neighborhood', 'category', 'kind', 'after']
 
 def index(request):
     if request.method != 'GET':
         return HttpResponseBadRequest()
 
+    if any(parameter in request.GET for parameter in SEARCH_PARAMETERS):
+        return render(request, 'events/search.html', {
+            'search': Event.objects.search(request),
+            'name': NAME,
+            'year': datetime.now(TZ).year,
+        })
+
     current_month = datetime.now(TZ).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
-    return render(request, 'events/index.html', {
+    response = render(request, 'events/index.html', {
         'calendar': Event.objects.calendar(request),
         'by_date': Event.objects.by_date(request),
         'by_location': Event.objects.by_location(request),
@@ -30,6 +44,24 @@ def index(request):
         'year': current_month.year,
     })
 
+    prewarm.adjacent(request)
+
+    return response
+
+def year(request, year):
+    if request.method != 'GET':
+        return HttpResponseBadRequest()
+
+    year = int(year)
+
+    return render(request, 'events/year.html', {
+        'by_year': Event.objects.year(year),
+        'prev': year - 1,
+        'next': year + 1,
+        'name': NAME,
+        'year': datetime.now(TZ).year,
+    })
+
 def event(request, category_slug, location_slug, event_slug, event_id):
     if request.method != 'GET':
         return HttpResponseBadRequest()
@@ -59,6 +91,61 @@ def event(request, category_slug, location_slug, event_slug, event_id):
         'GOOGLE_MAPS_API_KEY': GOOGLE_MAPS_API_KEY,
     })
 
+def occurrence(request, category_slug, location_slug, event_slug, info_id, occurrence):
+    if request.method != 'GET':
+        return HttpResponseBadRequest()
+
+    valid, response = RecurringEvent.objects.occurrence(category_slug, location_slug, event_slug, info_id, occurrence)
+
+    if not valid:
+        def invalid_id():
+            return HttpResponseNotFound("Invalid event ID")
+
+        def invalid_slug():
+            return HttpResponseRedirect(
+                reverse('events:occurrence', args=response['args'])
+            )
+
+        def moved():
+            return HttpResponseRedirect(response['url'])
+
+        actions = {
+            'invalid ID': invalid_id,
+            'invalid slug': invalid_slug,
+            'moved': moved,
+        }
+
+        return actions[response['status']]()
+
+    return render(request, 'events/event.html', {
+        **response,
+        'name': NAME,
+        'year': datetime.now(TZ).year,
+        'GOOGLE_MAPS_API_KEY': GOOGLE_MAPS_API_KEY,
+    })
+
+def update_occurrence(request):
+    if request.method != 'POST':
+        return HttpResponseBadRequest()
+
+    if not request.user.is_superuser:
+        return HttpResponseForbidden()
+
+    valid, response = RecurringEvent.objects.update_occurrence(request)
+
+    if not valid:
+        for error in response['errors']:
+            messages.error(request, error)
+
+        return redirect('events:index')
+
+    messages.success(request, response['success'])
+
+    if 'event' in response:
+        return redirect(response['event'])
+
+    return redirect('events:index')
+
 def create_event(request):
     if request.method != 'POST':
         return HttpResponseBadRequest()
@@ -73,6 +160,23 @@ def create_event(request):
 
     return redirect('users:index')
 
+def import_events(request):
+    if request.method != 'POST':
+        return HttpResponseBadRequest()
+
+    if not request.user.is_superuser:
+        return HttpResponseForbidden()
+
+    valid, response = Event.objects.import_events(request)
+
+    if not valid:
+        for error in response:
+            messages.error(request, error)
+    else:
+        messages.success(request, response)
+
+    return redirect('users:index')
+
 def update_event(request):
     if request.method != 'POST':
         return HttpResponseBadRequest()
@@ -115,26 +219,38 @@ def month(request):
     if request.method != 'GET':
         return HttpResponseBadRequest()
 
-    return render(request, 'events/month.html', {
+    response = render(request, 'events/month.html', {
         'calendar': Event.objects.calendar(request)
     })
 
+    prewarm.adjacent(request)
+
+    return response
+
 def by_date(request):
     if request.method != 'GET':
         return HttpResponseBadRequest()
 
-    return render(request, 'events/by_date.html', {
+    response = render(request, 'events/by_date.html', {
         'by_date': Event.objects.by_date(request)
     })
 
+    prewarm.adjacent(request)
+
+    return response
+
 def by_location(request):
     if request.method != 'GET':
         return HttpResponseBadRequest()
 
-    return render(request, 'events/by_location.html', {
+    response = render(request, 'events/by_location.html', {
         'by_location': Event.objects.by_location(request)
     })
 
+    prewarm.adjacent(request)
+
+    return response
+
 def prev(request):
     if request.method != 'GET':
         return HttpResponseBadRequest()
@@ -146,3 +262,94 @@ def next(request):
         return HttpResponseBadRequest()
 
     return JsonResponse(Event.objects.next(request))
+
+def month_json(request, year, month):
+    if request.method != 'GET':
+        return HttpResponseBadRequest()
+
+    year = int(year)
+    month = int(month)
+
+    etag, last_modified = Event.objects.version(year, month)
+    etag = quote_etag(etag)
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    if response is None:
+        response = JsonResponse({
+            'year': year,
+            'month': month,
+            'calendar': render_to_string('events/month.html', {
+                'calendar': Event.objects.calendar(request, year, month),
+            }, request),
+            'by_date': render_to_string('events/by_date.html', {
+                'by_date': Event.objects.by_date(request, year, month),
+            }, request),
+            'by_location': render_to_string('events/by_location.html', {
+                'by_location': Event.objects.by_location(request, year, month),
+            }, request),
+            'prev': Event.objects.prev(request, year, month),
+            'next': Event.objects.next(request, year, month),
+        })
+
+    prewarm.adjacent(request, year, month)
+
+    # Clients keep the payload but check back before reusing it
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+
+    return response
+
+def now(request):
+    if request.method != 'GET':
+        return HttpResponseBadRequest()
+
+    return JsonResponse(Event.objects.now(request))
+
+def tonight(request):
+    if request.method != 'GET':
+        return HttpResponseBadRequest()
+
+    return JsonResponse(Event.objects.tonight(request))
+
+def preview_recurrence(request):
+    if request.method != 'GET':
+        return HttpResponseBadRequest()
+
+    valid, response = RecurringEvent.objects.preview(request)
+
+    if not valid:
+        return JsonResponse({'errors': response}, status=400)
+
+    return JsonResponse(response)
+
+def changes(request):
+    if request.method != 'GET':
+        return HttpResponseBadRequest()
+
+    valid, response = Event.objects.changes(request)
+
+    if not valid:
+        def invalid_since():
+            return HttpResponseBadRequest('Invalid since parameter')
+
+        def expired():
+            return JsonResponse({'reset': True}, status=410)
+
+        actions = {
+            'invalid since': invalid_since,
+            'expired': expired,
+        }
+
+        return actions[response['status']]()
+
+    return JsonResponse(response)
+
+def feed(request):
+    if request.method != 'GET':
+        return HttpResponseBadRequest()
+
+    return ical.feed(request, NAME, 'events')
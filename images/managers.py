@@ -4,6 +4,7 @@ from django.contrib import messages
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError, PermissionDenied
 from django.db import models
+from django.db.models import Count, Window
 from django.http import HttpResponseForbidden
 from django.shortcuts import reverse
 from django.utils.translation import ugettext as _
@@ -241,6 +242,19 @@ class AlbumManager(models.Manager):
         return {'albums': albums}
 
 class ImageManager(models.Manager):
+    def preview(self, album, size=15):
+        from .models import Image
+
+        # The album's total rides along as a window aggregate so the preview
+        # and the count come back in one query
+        images = list(Image.objects.filter(album=album).annotate(
+            total=Window(Count('id')),
+        )[:size])
+
+        count = images[0].total if images else 0
+
+        return (images[:size - 1] if count > size else images, count)
+
     def remove_images(self, album, images):
         from .models import Image
 
@@ -51,7 +51,7 @@ class LocationManager(models.Manager):
         return {'locations': locations}
 
     def location(self, category_slug, location_name, location_id):
-        from mtm.settings import TZ
+        from mtm.settings import TZ, EVENTS_PER_PAGE
         from .models import Location, CATEGORIES
         from events.models import Event
 
@@ -69,15 +69,18 @@ class LocationManager(models.Manager):
                 'args': [_category_slug, _location_name, location_id],
             })
 
-        events = Event.objects.filter(
+        events, next_cursor = Event.objects.keyset(
+            datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0),
+            None,
+            None,
+            EVENTS_PER_PAGE,
             location=location,
-            date_start__gte=datetime.now(TZ).replace(
-                hour=0, minute=0, second=0, microsecond=0),
-        ).order_by('date_start')[:10]
+        )
 
         return (True, {
             'location': location,
             'events': events,
+            'next': next_cursor,
             'category_name': Location.CATEGORY_CHOICES[location.category][1],
             'category_slug': _category_slug,
             'no_kitchen': location.no_kitchen,
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0011_auto_20201026_1404'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(fields=['category'], name='location_category_idx'),
+        ),
+    ]
@@ -54,6 +54,11 @@ class Location(TimestampedModel, NewsItem):
     no_kitchen = models.BooleanField(default=False)
     objects = LocationManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['category'], name='location_category_idx'),
+        ]
+
     def category_slug(self):
         slugs = [
             'nightlife',
@@ -0,0 +1,11 @@
+$(() => {
+  // Load the next page of events in place of the "See more" link
+  $('#events').on('click', '.more a', function (event) {
+    event.preventDefault();
+
+    let $more = $(this).parent();
+    $.get($(this).attr('href'), function (response) {
+      $more.replaceWith(response);
+    });
+  });
+});
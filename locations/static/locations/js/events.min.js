@@ -0,0 +1 @@
+$(function(){$("#events").on("click",".more a",function(a){a.preventDefault();var b=$(this).parent();$.get($(this).attr("href"),function(c){b.replaceWith(c)})})});
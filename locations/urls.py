@@ -7,8 +7,12 @@ urlpatterns = [
     path('locations/autocomplete/', views.location_autocomplete, name='location-autocomplete'),
     path('neighborhoods/create/', views.create_location, name='create'),
     re_path(r'^neighborhoods/(?P<neighborhood_slug>[a-z]+(-[a-z]+)*)/(?P<neighborhood_id>[1-9]\d*)/$', views.neighborhood, name='neighborhood'),
+    re_path(r'^neighborhoods/(?P<neighborhood_slug>[a-z]+(-[a-z]+)*)/(?P<neighborhood_id>[1-9]\d*)/events/$', views.neighborhood_events, name='neighborhood-events'),
+    re_path(r'^neighborhoods/(?P<neighborhood_slug>[a-z]+(-[a-z]+)*)/(?P<neighborhood_id>[1-9]\d*)/events\.ics$', views.neighborhood_feed, name='neighborhood-feed'),
     path('locations/update/', views.update_location, name='update'),
     re_path(r'^(?P<category_slug>(nightlife|restaurants|nightlife-restaurants|arts-and-entertainment|health-and-fitness|sports|non-profit|editorials-and-opinions))/(?P<location_slug>[\da-z]+(-[\da-z]+)*)/(?P<location_id>[1-9]\d*)/$', views.location, name='location'),
+    re_path(r'^(?P<category_slug>(nightlife|restaurants|nightlife-restaurants|arts-and-entertainment|health-and-fitness|sports|non-profit|editorials-and-opinions))/(?P<location_slug>[\da-z]+(-[\da-z]+)*)/(?P<location_id>[1-9]\d*)/events/$', views.location_events, name='location-events'),
+    re_path(r'^(?P<category_slug>(nightlife|restaurants|nightlife-restaurants|arts-and-entertainment|health-and-fitness|sports|non-profit|editorials-and-opinions))/(?P<location_slug>[\da-z]+(-[\da-z]+)*)/(?P<location_id>[1-9]\d*)/events\.ics$', views.location_feed, name='location-feed'),
     re_path(r'^(?P<category_slug>(nightlife|restaurants|nightlife-restaurants|arts-and-entertainment|health-and-fitness|sports|non-profit|editorials-and-opinions))/(?P<location_slug>[\da-z]+(-[\da-z]+)*)/(?P<location_id>[1-9]\d*)/update/$', views.update_location, name='update'),
     re_path(r'^(?P<category_slug>(nightlife|restaurants|nightlife-restaurants|arts-and-entertainment|health-and-fitness|sports|non-profit|editorials-and-opinions))/(?P<location_slug>[\da-z]+(-[\da-z]+)*)/(?P<location_id>[1-9]\d*)/delete/$', views.delete_location, name='delete'),
 ]
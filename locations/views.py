@@ -1,4 +1,5 @@
 from datetime import datetime
+from urllib.parse import urlencode
 
 from django.contrib import messages
 from django.core.exceptions import ValidationError
@@ -13,6 +14,7 @@ from django.urls import reverse
 
 from mtm.settings import TZ, NAME, GOOGLE_MAPS_API_KEY
 from .models import Neighborhood, Location, CATEGORIES
+from events import ical
 from events.models import Event, RecurringEvent
 from .forms import LocationForm
 
@@ -32,21 +34,49 @@ def location_autocomplete(request):
         Location.objects.autocomplete(request)
     )
 
+def more_url(name, args, cursor):
+    if not cursor:
+        return None
+
+    return '%s?%s' % (reverse(name, args=args), urlencode({'after': cursor}))
+
 def neighborhood(request, neighborhood_slug, neighborhood_id):
     if request.method != 'GET':
         return HttpResponseBadRequest()
 
     neighborhood = Neighborhood.objects.get(id=neighborhood_id)
+    events, next_cursor = Event.objects.page(request, datetime.now(TZ), location__neighborhood=neighborhood)
 
     return render(request, 'locations/neighborhood.html', {
         'title': neighborhood.name,
-        'events': Event.objects.filter(location__neighborhood=neighborhood, date_start__gte=datetime.utcnow()).order_by('date_start')[:10],
+        'events': events,
+        'more': more_url('locations:neighborhood-events', [neighborhood.slug, neighborhood.id], next_cursor),
         'locations': Location.objects.filter(neighborhood=neighborhood).order_by('name'),
         'neighborhood': neighborhood,
         'name': NAME,
         'year': datetime.now(TZ).year,
     })
 
+def neighborhood_events(request, neighborhood_slug, neighborhood_id):
+    if request.method != 'GET':
+        return HttpResponseBadRequest()
+
+    neighborhood = get_object_or_404(Neighborhood, id=neighborhood_id)
+    events, next_cursor = Event.objects.page(request, datetime.now(TZ), location__neighborhood=neighborhood)
+
+    return render(request, 'events/event_list.html', {
+        'events': events,
+        'more': more_url('locations:neighborhood-events', [neighborhood.slug, neighborhood.id], next_cursor),
+    })
+
+def neighborhood_feed(request, neighborhood_slug, neighborhood_id):
+    if request.method != 'GET':
+        return HttpResponseBadRequest()
+
+    neighborhood = get_object_or_404(Neighborhood, id=neighborhood_id)
+
+    return ical.feed(request, '%s – %s' % (NAME, neighborhood.name), neighborhood.slug, location__neighborhood=neighborhood)
+
 def location(request, category_slug, location_slug, location_id):
     if request.method != 'GET':
         return HttpResponseBadRequest()
@@ -78,6 +108,7 @@ def location(request, category_slug, location_slug, location_id):
 
     return render(request, 'locations/location.html', {
         **response,
+        'more': more_url('locations:location-events', [category_slug, location_slug, location_id], response['next']),
         'title': name,
         'update_location_form': LocationForm(instance=location),
         'GOOGLE_MAPS_API_KEY': GOOGLE_MAPS_API_KEY,
@@ -155,3 +186,28 @@ def delete_location(request, category_slug, location_slug, location_id):
     messages.success(request, 'You have successfully deleted the location "%s%s"' % (name, '' if punctuation == '?' or punctuation == '!' or punctuation == '.' else '.'))
 
     return redirect('users:index')
+
+def location_events(request, category_slug, location_slug, location_id):
+    if request.method != 'GET':
+        return HttpResponseBadRequest()
+
+    location = get_object_or_404(Location, id=location_id)
+    events, next_cursor = Event.objects.page(
+        request,
+        datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0),
+        location=location,
+    )
+
+    return render(request, 'events/event_list.html', {
+        'events': events,
+        'hide_location': True,
+        'more': more_url('locations:location-events', [location.category_slug(), location.slug, location.id], next_cursor),
+    })
+
+def location_feed(request, category_slug, location_slug, location_id):
+    if request.method != 'GET':
+        return HttpResponseBadRequest()
+
+    location = get_object_or_404(Location, id=location_id)
+
+    return ical.feed(request, '%s – %s' % (NAME, location.name), location.slug, location=location)
@@ -71,7 +71,7 @@ INSTALLED_APPS = [
     'home',
     'users',
     'locations',
-    'events',
+    'events.apps.EventsConfig',
     'images',
     'articles',
     'django.contrib.admin',
@@ -141,6 +141,24 @@ else:
         }
     }
 
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+
+if STAGE == 'development':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    # Shared between worker processes so invalidation reaches all of them
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(BASE_DIR, '.cache'),
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -221,6 +239,8 @@ GOOGLE_MAPS_API_KEY = ''
 
 # Page length for paginators
 NEWS_ITEMS_PER_PAGE = 15
+EVENTS_PER_PAGE = 10
+EVENT_CHANGES_PER_PAGE = 500
 
 
 # Maximum number of invites at a time
@@ -238,3 +258,21 @@ else:
 INVITES_EXPIRY = datetime.timedelta(days=30)
 
 
+# Expiry duration for cached event listings, in seconds
+EVENTS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Longest time, in seconds, a process serves happening-now listings before
+# reloading them
+EVENTS_LIVE_REFRESH = 60 * 5
+
+# Background threads per process that build the months next to the one
+# being viewed, and the most months a process keeps waiting to be built
+EVENTS_PREWARM_WORKERS = 2
+EVENTS_PREWARM_QUEUE = 12
+
+
+# Days deleted events stay in the change feed; clients that fall further
+# behind have to download everything again
+EVENTS_TOMBSTONE_DAYS = 30
+
+